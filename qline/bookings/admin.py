@@ -1,11 +1,131 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db import transaction
+from django.urls import reverse
+from qline.paginator import EstimatedCountPaginator
+from .counters import record_status_change
+from .events import publish_appointment_event
 from .models import Appointment
 
+
+class OrgAutocompleteFilter(admin.SimpleListFilter):
+    """Organization filter that searches through the admin autocomplete view.
+
+    Only the selected organization is rendered, instead of an option per row in
+    the organization table.
+    """
+
+    title = "organization"
+    parameter_name = "org__id__exact"
+    template = "admin/bookings/autocomplete_filter.html"
+    app_label = "bookings"
+    model_name = "appointment"
+    field_name = "org"
+
+    def __init__(self, request, params, model, model_admin):
+        self.remote_model = model._meta.get_field(self.field_name).remote_field.model
+        self.autocomplete_url = reverse("admin:autocomplete", current_app=model_admin.admin_site.name)
+        super().__init__(request, params, model, model_admin)
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        if not value or not value.isdigit():
+            return []
+        return [(obj.pk, str(obj)) for obj in self.remote_model.objects.filter(pk=value)]
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.value() is None,
+            "query_string": changelist.get_query_string(remove=[self.parameter_name]),
+            "display": "All",
+        }
+        for value, display in self.lookup_choices:
+            yield {
+                "selected": True,
+                "value": value,
+                "query_string": changelist.get_query_string({self.parameter_name: value}),
+                "display": display,
+            }
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        if not value.isdigit():
+            raise IncorrectLookupParameters(f"Invalid organization id {value!r}")
+        return queryset.filter(org_id=value)
+
+
+class StatusFilter(admin.SimpleListFilter):
+    """Status filter with fixed choices.
+
+    The default filter for a plain CharField lists the distinct values in the
+    table, which is a full scan on every changelist load.
+    """
+
+    title = "status"
+    parameter_name = "status__exact"
+    STATUSES = ["Booked", "Completed", "Missed", "Cancelled"]
+
+    def lookups(self, request, model_admin):
+        return [(status, status) for status in self.STATUSES]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(status=self.value())
+        return queryset
+
+
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = ("id", "get_email", "name", "org", "date", "time_slot", "phone", "status")
-    list_filter = ("org", "date", "status")
+    # A date range filter instead of date_hierarchy: the hierarchy lists the
+    # distinct years/months/days in the table on every load, calling a
+    # Python function per row on SQLite; the range filters use appt_date_idx.
+    list_filter = (OrgAutocompleteFilter, StatusFilter, ("date", admin.DateFieldListFilter))
+    list_select_related = ("user", "org")
     search_fields = ("name", "user__username", "user__email", "phone", "time_slot")
+    autocomplete_fields = ("user", "org")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(Appointment._meta.get_field("org"), self.admin_site).media
+
+    # Admin edits go through the daily rollup and slot-change events like the
+    # booking views do, so OrgDailyStats and cached slot grids stay in step.
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            old = Appointment.objects.select_for_update().filter(pk=obj.pk).first() if change else None
+            super().save_model(request, obj, form, change)
+            if old is None:
+                record_status_change(obj.org_id, obj.date, None, obj.status)
+                publish_appointment_event("booked", obj)
+            elif (old.org_id, old.date, old.start_minute) != (obj.org_id, obj.date, obj.start_minute):
+                record_status_change(old.org_id, old.date, old.status, None)
+                publish_appointment_event("deleted", old)
+                record_status_change(obj.org_id, obj.date, None, obj.status)
+                publish_appointment_event("updated", obj)
+            elif old.status != obj.status:
+                record_status_change(obj.org_id, obj.date, old.status, obj.status)
+                publish_appointment_event("updated", obj)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            deleted, _ = Appointment.objects.filter(pk=obj.pk, status=obj.status).delete()
+            if deleted:
+                record_status_change(obj.org_id, obj.date, obj.status, None)
+                publish_appointment_event("deleted", obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            for obj in queryset.select_for_update():
+                self.delete_model(request, obj)
 
     def get_email(self, obj):
         return obj.user.email
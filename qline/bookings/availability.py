@@ -0,0 +1,22 @@
+from django.db.models import F
+
+from .models import AvailabilityVersion
+
+
+def availability_version(org_id, day, using=None):
+    """Counter that changes whenever the booked slots of an org on ``day`` may have."""
+    versions = AvailabilityVersion.objects.using(using).filter(org_id=org_id, date=day)
+    return versions.values_list("version", flat=True).first() or 0
+
+
+def bump_availability(org_id, day):
+    """Invalidate cached slot grids for ``day``.
+
+    Call inside the transaction that changes the slots: the bump commits
+    with the change, so a grid rendered from the old rows is never stored
+    under the new version.
+    """
+    versions = AvailabilityVersion.objects.filter(org_id=org_id, date=day)
+    if not versions.update(version=F("version") + 1):
+        AvailabilityVersion.objects.get_or_create(org_id=org_id, date=day)
+        versions.update(version=F("version") + 1)
@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .counters import record_status_change
+from .events import publish_appointment_event, publish_bulk_event
+from .models import Appointment
+
+
+def transition_appointment(appointment, new_status, event_type):
+    """Move ``appointment`` from the status it was loaded with to ``new_status``.
+
+    The UPDATE only matches while the row still has that status, so when two
+    requests change the same appointment at once only one of them records
+    the change. Returns whether this call made it.
+    """
+    old_status = appointment.status
+    if old_status == new_status:
+        return False
+    with transaction.atomic():
+        updated_at = timezone.now()
+        if not Appointment.objects.filter(pk=appointment.pk, status=old_status).update(
+            status=new_status, updated_at=updated_at
+        ):
+            return False
+        appointment.status, appointment.updated_at = new_status, updated_at
+        record_status_change(appointment.org_id, appointment.date, old_status, new_status)
+        publish_appointment_event(event_type, appointment)
+    return True
+
+
+def bulk_transition(appointments, new_status, event_type):
+    """Move the Booked rows of ``appointments`` to ``new_status`` with one UPDATE.
+
+    The daily rollup is adjusted once per (org, day) and each (org, day) gets
+    a single event listing the slots that changed. Returns the number of
+    appointments changed.
+    """
+    with transaction.atomic():
+        rows = list(
+            appointments.filter(status="Booked").select_for_update()
+            .values_list("id", "org_id", "date", "start_minute")
+        )
+        if not rows:
+            return 0
+        Appointment.objects.filter(id__in=[row[0] for row in rows], status="Booked").update(
+            status=new_status, updated_at=timezone.now()
+        )
+
+        starts_by_day = defaultdict(list)
+        for _, org_id, day, start_minute in rows:
+            starts_by_day[org_id, day].append(start_minute)
+        for (org_id, day), start_minutes in starts_by_day.items():
+            record_status_change(org_id, day, "Booked", new_status, count=len(start_minutes))
+            publish_bulk_event(event_type, org_id, day, start_minutes, new_status)
+    return len(rows)
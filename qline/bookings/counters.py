@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Appointment, OrgDailyStats
+
+# Appointment.status -> OrgDailyStats column.
+STAT_FIELDS = {"Booked": "booked", "Completed": "completed", "Missed": "missed", "Cancelled": "cancelled"}
+
+# All-time totals shown on the staff dashboard.
+COUNTED_STATUSES = {"Completed": "completed_count", "Missed": "missed_count"}
+COUNTER_TIMEOUT = 60 * 60
+
+
+def counter_cache_enabled():
+    return getattr(settings, "DASHBOARD_COUNTER_CACHE", False)
+
+
+def _key(org_id, status):
+    return f"org-status-count:{org_id}:{status}"
+
+
+def status_totals(org):
+    """All-time completed/missed totals, summed from the daily rollup."""
+    totals = OrgDailyStats.objects.filter(org=org).aggregate(
+        **{status: Sum(STAT_FIELDS[status], default=0) for status in COUNTED_STATUSES}
+    )
+    if counter_cache_enabled():
+        for status, total in totals.items():
+            cache.add(_key(org.pk, status), total, COUNTER_TIMEOUT)
+    return totals
+
+
+def dashboard_counts(org, today):
+    """Today/upcoming/completed/missed counters for one organization.
+
+    Today and upcoming come from one conditional aggregate over today onwards;
+    completed and missed totals come from the rollup, or from the cache when
+    DASHBOARD_COUNTER_CACHE is on. Neither path scans the org's history.
+    """
+    counts = Appointment.objects.filter(org=org, date__gte=today).aggregate(
+        today_count=Count("id", filter=Q(date=today)),
+        upcoming_count=Count("id", filter=Q(date__gt=today, status="Booked")),
+    )
+
+    totals = None
+    if counter_cache_enabled():
+        cached = cache.get_many([_key(org.pk, status) for status in COUNTED_STATUSES])
+        if len(cached) == len(COUNTED_STATUSES):
+            totals = {status: cached[_key(org.pk, status)] for status in COUNTED_STATUSES}
+    if totals is None:
+        totals = status_totals(org)
+
+    for status, name in COUNTED_STATUSES.items():
+        counts[name] = totals[status]
+    return counts
+
+
+def _incr_cached_totals(org_id, old_status, new_status, count):
+    for status, delta in ((old_status, -count), (new_status, count)):
+        if status in COUNTED_STATUSES:
+            try:
+                cache.incr(_key(org_id, status), delta)
+            except ValueError:
+                # Not cached yet; the next dashboard read fills it from the rollup.
+                pass
+
+
+def record_status_change(org_id, day, old_status, new_status, count=1):
+    """Apply a booking/serve/skip/cancel transition to the rollup and cache.
+
+    ``old_status`` is None for a new booking and ``new_status`` is None for a
+    deleted one. Call inside the transaction that changes the appointments.
+    """
+    if old_status == new_status:
+        return
+
+    changes = {}
+    if old_status in STAT_FIELDS:
+        changes[STAT_FIELDS[old_status]] = F(STAT_FIELDS[old_status]) - count
+    if new_status in STAT_FIELDS:
+        changes[STAT_FIELDS[new_status]] = F(STAT_FIELDS[new_status]) + count
+
+    if changes:
+        stats = OrgDailyStats.objects.filter(org_id=org_id, date=day)
+        if not stats.update(**changes):
+            OrgDailyStats.objects.get_or_create(org_id=org_id, date=day)
+            stats.update(**changes)
+
+    if counter_cache_enabled():
+        transaction.on_commit(lambda: _incr_cached_totals(org_id, old_status, new_status, count))
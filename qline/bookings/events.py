@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .availability import bump_availability
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Queue of events for one connected client. Create and read it on an event loop."""
+
+    def __init__(self, broker, org_id):
+        self.broker = broker
+        self.org_id = org_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, event):
+        # Runs on self.loop; a client that stops reading just misses events.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Per-organization pub/sub within one server process.
+
+    Publishing is thread-safe, so sync views running in worker threads can
+    reach subscribers waiting on the ASGI event loop. Deployments with several
+    worker processes need a shared backend with the same publish/subscribe
+    interface, selected through the EVENT_BROKER setting. Events published
+    by management commands (expire_appointments, import_orgs) never reach
+    this broker's subscribers either.
+    """
+
+    # Subscribers only hear events published in their own process.
+    cross_process = False
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, org_id):
+        subscription = Subscription(self, org_id)
+        with self._lock:
+            self._subscriptions[org_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.org_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.org_id]
+
+    def publish(self, org_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(org_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, "EVENT_BROKER", "bookings.events.InProcessBroker"))()
+    return _broker
+
+
+def live_events_available():
+    """Whether subscribers see every event: true for a cross-process broker or a single worker."""
+    return getattr(get_broker(), "cross_process", False) or getattr(settings, "WEB_CONCURRENCY", 1) == 1
+
+
+def publish_appointment_event(event_type, appointment):
+    """Announce a booking/serve/skip/cancel to the org's channel once committed.
+
+    The payload carries no personal data; booking pages only need to know
+    which slot changed. Cached slot grids for the day are invalidated too, in
+    the caller's transaction.
+    """
+    event = {
+        "type": event_type,
+        "date": appointment.date.isoformat(),
+        "start_minute": appointment.start_minute,
+        "status": appointment.status,
+    }
+    org_id = appointment.org_id
+    bump_availability(org_id, appointment.date)
+    transaction.on_commit(lambda: get_broker().publish(org_id, event))
+
+
+def publish_bulk_event(event_type, org_id, day, start_minutes, status):
+    """Like publish_appointment_event, for many appointments of one org and day."""
+    event = {
+        "type": event_type,
+        "date": day.isoformat(),
+        "start_minute": None,
+        "start_minutes": sorted(minute for minute in start_minutes if minute is not None),
+        "status": status,
+    }
+    bump_availability(org_id, day)
+    transaction.on_commit(lambda: get_broker().publish(org_id, event))
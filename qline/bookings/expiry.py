@@ -0,0 +1,74 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .bulk import bulk_transition
+from .models import Appointment
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_CHUNK_SIZE = 500
+
+
+def past_booked(now=None):
+    """Booked appointments whose slot has already ended."""
+    now = now or datetime.now()
+    today = now.date()
+    return Appointment.objects.filter(
+        Q(date__lt=today) | Q(date=today, end_minute__lte=now.hour * 60 + now.minute),
+        status="Booked",
+    )
+
+
+def expire_past_appointments(now=None, chunk_size=EXPIRY_CHUNK_SIZE):
+    """Mark past Booked appointments as Missed, ``chunk_size`` rows per transaction.
+
+    Only Booked rows are touched, so running it again (or from several
+    processes at once) is harmless. Returns the number of appointments expired.
+    """
+    past = past_booked(now).order_by()
+    total = 0
+    while True:
+        ids = list(past.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return total
+        total += bulk_transition(Appointment.objects.filter(id__in=ids), "Missed", "expired")
+
+
+def _run_scheduler(interval):
+    while True:
+        try:
+            expired = expire_past_appointments()
+            if expired:
+                logger.info("Expired %d past appointments", expired)
+        except Exception:
+            logger.exception("Appointment expiry failed")
+        finally:
+            connection.close()
+        time.sleep(interval)
+
+
+_scheduler_started = False
+_scheduler_lock = threading.Lock()
+
+
+def start_expiry_scheduler():
+    """Run expiry every APPOINTMENT_EXPIRY_INTERVAL seconds in a daemon thread.
+
+    Does nothing unless the setting is set. Called from the WSGI/ASGI entry
+    points so management commands never start it.
+    """
+    global _scheduler_started
+    interval = getattr(settings, "APPOINTMENT_EXPIRY_INTERVAL", None)
+    if not interval:
+        return
+    with _scheduler_lock:
+        if _scheduler_started:
+            return
+        _scheduler_started = True
+    threading.Thread(target=_run_scheduler, args=(interval,), name="appointment-expiry", daemon=True).start()
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from bookings.counters import STAT_FIELDS
+from bookings.models import Appointment, ArchivedAppointment, OrgDailyStats
+from staff.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Rebuild the OrgDailyStats rollup from Appointment and ArchivedAppointment rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, action="append", help="Only rebuild this organization id (repeatable).")
+
+    def handle(self, *args, **options):
+        org_ids = options["org"] or Organization.objects.order_by("id").values_list("id", flat=True)
+        total_rows = 0
+        for org_id in org_ids:
+            # One short transaction per organization keeps write locks brief.
+            with transaction.atomic():
+                rows = {}
+                for model in (Appointment, ArchivedAppointment):
+                    grouped = (
+                        model.objects.filter(org_id=org_id)
+                        .values_list("date", "status")
+                        .annotate(n=Count("id"))
+                        .order_by()
+                    )
+                    for day, status, n in grouped:
+                        if status in STAT_FIELDS:
+                            row = rows.setdefault(day, OrgDailyStats(org_id=org_id, date=day))
+                            field = STAT_FIELDS[status]
+                            setattr(row, field, getattr(row, field) + n)
+
+                OrgDailyStats.objects.filter(org_id=org_id).delete()
+                OrgDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+                total_rows += len(rows)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total_rows} daily stats rows."))
@@ -0,0 +1,111 @@
+import json
+import statistics
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from bookings.management.commands.bench_sqlite_writes import percentile_ms
+from bookings.models import Appointment
+from staff.context import get_staff_context
+from staff.models import Organization
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the hot views through the test client and report p50/p99 latency "
+        "and query counts per view. Uses the busiest branch and user in the "
+        "database (see seed_load)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--org", type=int, help="Organization id (default: the one with most appointments).")
+        parser.add_argument("--views", help="Comma-separated subset of view names.")
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        org = self.pick_org(options["org"])
+        user = User.objects.filter(id=self.busiest(Appointment.objects.filter(org=org), "user")).first()
+        if user is None:
+            raise CommandError("No appointments found; run seed_load first.")
+        tomorrow = date.today() + timedelta(days=1)
+
+        user_client = Client()
+        user_client.force_login(user)
+        staff_client = Client()
+        session = staff_client.session
+        session["staff_id"] = org.staff_id
+        session.save()
+        # staff_appointments and staff_history show the staff member's first
+        # organization, which is not necessarily the one benchmarked.
+        staff_org = get_staff_context(org.staff_id).org
+
+        views = {
+            "branch_details": (user_client, org, f"{reverse('branch_details', args=[org.id])}?date={tomorrow}"),
+            "book_appointment": (user_client, org, f"{reverse('book_appointment')}?service_type={org.service_type}&location={org.location}"),
+            "dashboard": (user_client, None, reverse("dashboard")),
+            "staff_dashboard": (staff_client, org, reverse("staff_dashboard", args=[org.id])),
+            "staff_appointments": (staff_client, staff_org, reverse("staff_appointments")),
+            "staff_history": (staff_client, staff_org, reverse("staff_history")),
+        }
+        if options["views"]:
+            views = {name: views[name] for name in options["views"].split(",")}
+
+        results = [self.measure(name, client, view_org, url, options["iterations"], options["warmup"])
+                   for name, (client, view_org, url) in views.items()]
+
+        self.stdout.write(f"org {org.id}, user {user.id}, {options['iterations']} iterations")
+        self.stdout.write(f"{'view':<20}{'org':>7}{'status':>7}{'p50 ms':>9}{'p99 ms':>9}{'queries':>9}")
+        for r in results:
+            self.stdout.write(
+                f"{r['view']:<20}{r['org'] or '-':>7}{r['status']:>7}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['queries']:>9}"
+            )
+        if options["json_path"]:
+            Path(options["json_path"]).write_text(json.dumps({
+                "org": org.id,
+                "user": user.id,
+                "iterations": options["iterations"],
+                "appointments": Appointment.objects.count(),
+                "results": results,
+            }, indent=2))
+
+    def busiest(self, queryset, field):
+        row = queryset.values(field).annotate(n=Count("id")).order_by("-n").first()
+        return row and row[field]
+
+    def pick_org(self, org_id):
+        org_id = org_id or self.busiest(Appointment.objects.all(), "org")
+        org = Organization.objects.filter(id=org_id).first()
+        if org is None:
+            raise CommandError("No organization to benchmark; run seed_load first.")
+        return org
+
+    def measure(self, name, client, org, url, iterations, warmup):
+        for _ in range(warmup):
+            client.get(url)
+        latencies, queries = [], []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                began = time.perf_counter()
+                response = client.get(url)
+                latencies.append(time.perf_counter() - began)
+            queries.append(len(captured))
+        return {
+            "view": name,
+            "org": org and org.id,
+            "url": url,
+            "status": response.status_code,
+            "p50_ms": percentile_ms(latencies, 0.50),
+            "p99_ms": percentile_ms(latencies, 0.99),
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "queries": max(queries),
+        }
@@ -0,0 +1,130 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from bookings.reservations import reserve_appointment, SlotTaken, BookingLimitReached
+from staff.models import Staff, Organization
+
+
+def percentile_ms(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark booking throughput with N concurrent writers against a scratch "
+        "SQLite file, once per database profile (default vs production)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", default="1,4,8,16", help="Comma-separated writer thread counts.")
+        parser.add_argument("--bookings", type=int, default=50, help="Bookings per writer.")
+        parser.add_argument("--profiles", default="default,production")
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this file.")
+        # Internal: run one measurement in this process and print it as JSON.
+        parser.add_argument("--worker", action="store_true", help="Internal: run one measurement and print JSON.")
+
+    def handle(self, *args, **options):
+        writer_counts = [int(n) for n in options["writers"].split(",")]
+        if options["worker"]:
+            self.stdout.write(json.dumps(self.measure(writer_counts[0], options["bookings"])))
+            return
+
+        results = []
+        for profile in options["profiles"].split(","):
+            for writers in writer_counts:
+                results.append(self.run_isolated(profile, writers, options["bookings"]))
+
+        self.stdout.write(f"{'profile':<12}{'writers':>8}{'booked':>8}{'errors':>8}{'per sec':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        for r in results:
+            self.stdout.write(
+                f"{r['profile']:<12}{r['writers']:>8}{r['booked']:>8}{r['errors']:>8}"
+                f"{r['per_second']:>10.1f}{r['p50_ms'] or 0:>9.1f}{r['p99_ms'] or 0:>9.1f}"
+            )
+        if options["json_path"]:
+            Path(options["json_path"]).write_text(json.dumps(results, indent=2))
+
+    def run_isolated(self, profile, writers, bookings):
+        # Each run gets a fresh process so the profile's connection options apply.
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, QLINE_DB_PROFILE=profile, QLINE_SQLITE_PATH=str(Path(tmp) / "bench.sqlite3"))
+            proc = subprocess.run(
+                [sys.executable, str(Path(settings.BASE_DIR) / "manage.py"), "bench_sqlite_writes", "--worker",
+                 "--writers", str(writers), "--bookings", str(bookings)],
+                env=env, capture_output=True, text=True,
+            )
+        if proc.returncode != 0:
+            raise CommandError(proc.stderr)
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result["profile"] = profile
+        return result
+
+    def measure(self, writers, bookings):
+        if not str(settings.DATABASES["default"]["NAME"]).endswith("bench.sqlite3"):
+            raise CommandError("--worker only runs against the scratch database set up by this command.")
+        call_command("migrate", verbosity=0)
+
+        staff = Staff.objects.create(email="bench@example.com")
+        org = Organization.objects.create(
+            staff=staff, org_name="Bench", service_type="clinic", location="Bench",
+            branch_address="-", phone_number="0000000000", working_hours="12:00 AM - 11:59 PM",
+            appointment_duration=10,
+        )
+        users = User.objects.bulk_create(User(username=f"bench{i}") for i in range(writers * bookings))
+        connection.close()
+
+        latencies, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(writers)
+
+        def writer(index):
+            try:
+                barrier.wait()
+                for n in range(bookings):
+                    slot = index * bookings + n
+                    day, start = date(2030, 1, 1) + timedelta(days=slot // 144), slot % 144 * 10
+                    began = time.perf_counter()
+                    try:
+                        reserve_appointment(users[slot], org, day, start, start + 10,
+                                            name="Bench", time_slot="", phone="0000000000")
+                    except (OperationalError, SlotTaken, BookingLimitReached) as exc:
+                        with lock:
+                            errors.append(type(exc).__name__)
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - began)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            "writers": writers,
+            "booked": len(latencies),
+            "errors": len(errors),
+            "seconds": round(elapsed, 3),
+            "per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile_ms(latencies, 0.50),
+            "p99_ms": percentile_ms(latencies, 0.99),
+        }
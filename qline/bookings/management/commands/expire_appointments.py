@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.expiry import EXPIRY_CHUNK_SIZE, expire_past_appointments
+
+
+class Command(BaseCommand):
+    help = "Mark Booked appointments whose slot has ended as Missed. Safe to run every minute."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=EXPIRY_CHUNK_SIZE, help="Rows updated per transaction.")
+        parser.add_argument("--interval", type=float, help="Keep running every N seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_past_appointments(chunk_size=options["chunk_size"])
+            self.stdout.write(self.style.SUCCESS(f"Expired {expired} appointments."))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from qline.profiling import PROFILE_HEADER, PROFILE_PARAM, make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed token that enables request profiling for PROFILE_TOKEN_MAX_AGE seconds."
+
+    def handle(self, *args, **options):
+        token = make_profile_token()
+        self.stdout.write(token)
+        self.stderr.write(
+            f"Send it as ?{PROFILE_PARAM}=<token> or the {PROFILE_HEADER} header; valid for "
+            f"{getattr(settings, 'PROFILE_TOKEN_MAX_AGE', 3600)}s. Profiles are written to {settings.PROFILE_DIR}."
+        )
@@ -0,0 +1,188 @@
+import random
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import transaction
+
+from bookings.models import Appointment
+from staff.models import Staff, Organization, TimeSlot, Holiday, normalize_search
+from staff.schedule import parse_slot, slot_label
+
+SEED_DOMAIN = "seed.qline.test"
+LOCATIONS = [
+    "Mumbai", "Delhi", "Bengaluru", "Hyderabad", "Ahmedabad", "Chennai", "Kolkata", "Pune", "Jaipur", "Surat",
+    "Lucknow", "Kanpur", "Nagpur", "Indore", "Thane", "Bhopal", "Visakhapatnam", "Patna", "Vadodara", "Ludhiana",
+]
+SLOT_GROUPS = [
+    ["09:00 AM - 01:00 PM", "02:00 PM - 06:00 PM"],
+    ["08:00 AM - 12:00 PM"],
+    ["10:00 AM - 02:00 PM", "03:00 PM - 08:00 PM"],
+    ["07:00 AM - 11:00 AM", "04:00 PM - 09:00 PM"],
+    ["11:00 AM - 07:00 PM"],
+]
+DURATIONS = [10, 15, 20, 30]
+PAST_STATUSES = (["Completed", "Missed", "Cancelled"], [72, 13, 15])
+FUTURE_STATUSES = (["Booked", "Cancelled"], [85, 15])
+COLLISION_RETRIES = 10
+# seed_load only writes to a database file whose name ends with this.
+SCRATCH_SUFFIX = "scratch.sqlite3"
+
+
+def zipf_weights(n, s):
+    """Cumulative weights giving rank ``k`` a share proportional to 1 / k**s."""
+    return list(accumulate(1 / (k + 1) ** s for k in range(n)))
+
+
+def slot_starts(slot_ranges, duration):
+    starts = []
+    for slot_range in slot_ranges:
+        start, end = parse_slot(slot_range)
+        starts.extend(range(start, end - duration + 1, duration))
+    return starts
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic load: staff, organizations, slot groups, "
+        "holidays, users and appointments, with Zipf-skewed branch and user "
+        "popularity, recent-heavy dates and morning-heavy slots. Only runs against a "
+        f"scratch database: point QLINE_SQLITE_PATH at a file named *{SCRATCH_SUFFIX}."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orgs", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=50000)
+        parser.add_argument("--appointments", type=int, default=1_000_000)
+        parser.add_argument("--days-back", type=int, default=365)
+        parser.add_argument("--days-ahead", type=int, default=30)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=1, help="Random seed, so runs are comparable.")
+
+    def handle(self, *args, **options):
+        if not str(settings.DATABASES["default"]["NAME"]).endswith(SCRATCH_SUFFIX):
+            raise CommandError(
+                f"seed_load only runs against a scratch database; set QLINE_SQLITE_PATH to a *{SCRATCH_SUFFIX} file."
+            )
+        if Staff.objects.filter(email__endswith=f"@{SEED_DOMAIN}").exists():
+            raise CommandError("Seed data already present; run against a fresh database.")
+
+        self.rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        orgs = self.seed_orgs(options["orgs"])
+        users = self.seed_users(options["users"], options["batch_size"])
+        appointments = self.seed_appointments(orgs, users, options)
+        call_command("backfill_daily_stats", stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(orgs)} organizations, {len(users)} users and {appointments} appointments "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def seed_orgs(self, count):
+        rng = self.rng
+        password = make_password(None)
+        with transaction.atomic():
+            staff = Staff.objects.bulk_create(
+                Staff(email=f"staff{i}@{SEED_DOMAIN}", password=password) for i in range((count + 4) // 5)
+            )
+            orgs = []
+            for i in range(count):
+                service_type = rng.choice(Organization.SERVICE_CHOICES)[0]
+                location = rng.choice(LOCATIONS)
+                orgs.append(Organization(
+                    staff=staff[i // 5],
+                    org_name=f"{service_type.title()} {i}",
+                    service_type=service_type,
+                    location=location,
+                    branch_address=f"{rng.randint(1, 999)} Main Road, {location}",
+                    phone_number=f"9{rng.randrange(10 ** 9):09d}",
+                    working_hours="07:00 AM - 09:00 PM",
+                    appointment_duration=rng.choice(DURATIONS),
+                    service_type_search=normalize_search(service_type),
+                    location_search=normalize_search(location),
+                ))
+            orgs = Organization.objects.bulk_create(orgs)
+
+            slots, holidays = [], []
+            today = date.today()
+            for org in orgs:
+                org.slot_ranges = rng.choice(SLOT_GROUPS)
+                slots.extend(TimeSlot(organization=org, slot_range=r) for r in org.slot_ranges)
+                holidays.extend(
+                    Holiday(organization=org, date=today + timedelta(days=rng.randint(-60, 60)))
+                    for _ in range(rng.randint(0, 4))
+                )
+            TimeSlot.objects.bulk_create(slots)
+            Holiday.objects.bulk_create(holidays)
+        self.stdout.write(f"  {len(orgs)} organizations, {len(slots)} slot groups, {len(holidays)} holidays")
+        return orgs
+
+    def seed_users(self, count, batch_size):
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            (User(username=f"user{i}@{SEED_DOMAIN}", email=f"user{i}@{SEED_DOMAIN}", first_name=f"User{i}", password=password)
+             for i in range(count)),
+            batch_size=batch_size,
+        )
+        self.stdout.write(f"  {len(users)} users")
+        return users
+
+    def seed_appointments(self, orgs, users, options):
+        rng = self.rng
+        today = date.today()
+        days_back, days_ahead = options["days_back"], options["days_ahead"]
+        # A few branches and frequent users take most of the bookings.
+        order = orgs[:]
+        rng.shuffle(order)
+        org_weights = zipf_weights(len(order), 1.1)
+        user_weights = zipf_weights(len(users), 0.8)
+        starts = {org.id: slot_starts(org.slot_ranges, org.appointment_duration) for org in orgs}
+        taken = set()
+
+        def draw():
+            org = rng.choices(order, cum_weights=org_weights)[0]
+            # Recent days are busier than old ones.
+            offset = min(int(rng.expovariate(1 / (days_back / 3))), days_back) if rng.random() < 0.9 else -rng.randint(0, days_ahead)
+            org_starts = starts[org.id]
+            # Morning slots fill first.
+            start = org_starts[min(int(rng.expovariate(3 / len(org_starts))), len(org_starts) - 1)]
+            return org, today - timedelta(days=offset), start
+
+        created = 0
+        batch = []
+        started = time.perf_counter()
+        for n in range(options["appointments"]):
+            for _ in range(COLLISION_RETRIES):
+                org, day, start = draw()
+                statuses, weights = PAST_STATUSES if day < today else FUTURE_STATUSES
+                status = rng.choices(statuses, weights)[0]
+                if status == "Cancelled" or (org.id, day, start) not in taken:
+                    break
+            else:
+                status = "Cancelled"
+            if status != "Cancelled":
+                taken.add((org.id, day, start))
+            user = rng.choices(users, cum_weights=user_weights)[0]
+            end = start + org.appointment_duration
+            batch.append(Appointment(
+                user=user, org=org, name=user.first_name, phone=f"9{n % 10 ** 9:09d}", date=day,
+                time_slot=slot_label(start, end), start_minute=start, end_minute=end, status=status,
+            ))
+            if len(batch) >= options["batch_size"]:
+                created += self.flush(batch)
+                batch = []
+                if created % (options["batch_size"] * 20) == 0:
+                    self.stdout.write(f"  {created} appointments ({created / (time.perf_counter() - started):.0f}/s)")
+        created += self.flush(batch)
+        return created
+
+    def flush(self, batch):
+        with transaction.atomic():
+            Appointment.objects.bulk_create(batch)
+        return len(batch)
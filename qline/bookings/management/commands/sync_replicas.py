@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto every replica in DATABASE_REPLICAS. "
+        "A local stand-in for real replication."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, help="Keep syncing every N seconds.")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES["default"]
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("sync_replicas only supports SQLite databases.")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas configured; set QLINE_SQLITE_REPLICAS.")
+
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(primary["NAME"])
+            try:
+                for alias in settings.DATABASE_REPLICAS:
+                    target = sqlite3.connect(settings.DATABASES[alias]["NAME"])
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+            self.stdout.write(
+                f"Synced {len(settings.DATABASE_REPLICAS)} replica(s) in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:38
+
+import re
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def parse_time(value):
+    t = datetime.strptime(value.strip(), "%I:%M %p").time()
+    return t.hour * 60 + t.minute
+
+
+def fill_start_end_minute(apps, schema_editor):
+    Appointment = apps.get_model("bookings", "Appointment")
+    batch = []
+    for appt in Appointment.objects.only("id", "time_slot").iterator(chunk_size=2000):
+        try:
+            start_str, end_str = re.split(r"[–-]", appt.time_slot)
+            appt.start_minute, appt.end_minute = parse_time(start_str), parse_time(end_str)
+        except ValueError:
+            continue
+        batch.append(appt)
+        if len(batch) >= 2000:
+            Appointment.objects.bulk_update(batch, ["start_minute", "end_minute"])
+            batch = []
+    Appointment.objects.bulk_update(batch, ["start_minute", "end_minute"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0003_appointment_updated_at"),
+        ("staff", "0009_organization_schedule_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="end_minute",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="start_minute",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_start_end_minute, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["org", "date", "start_minute"], name="appt_org_date_start_idx"),
+        ),
+    ]
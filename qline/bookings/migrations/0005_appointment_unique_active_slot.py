@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+def cancel_double_bookings(apps, schema_editor):
+    # Keep the earliest active booking per slot; later duplicates were created
+    # by the check-then-insert race and would violate the new constraint.
+    Appointment = apps.get_model("bookings", "Appointment")
+    seen = set()
+    duplicates = []
+    active = (
+        Appointment.objects.exclude(status="Cancelled")
+        .exclude(start_minute=None)
+        .order_by("id")
+        .values_list("id", "org_id", "date", "start_minute")
+    )
+    for appt_id, org_id, date, start_minute in active.iterator(chunk_size=2000):
+        key = (org_id, date, start_minute)
+        if key in seen:
+            duplicates.append(appt_id)
+        else:
+            seen.add(key)
+    Appointment.objects.filter(id__in=duplicates).update(status="Cancelled")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0004_appointment_start_end_minute"),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "Cancelled"), _negated=True),
+                fields=("org", "date", "start_minute"),
+                name="appt_unique_active_slot",
+            ),
+        ),
+    ]
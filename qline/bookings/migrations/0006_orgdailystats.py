@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+STAT_FIELDS = {"Booked": "booked", "Completed": "completed", "Missed": "missed", "Cancelled": "cancelled"}
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Appointment = apps.get_model("bookings", "Appointment")
+    OrgDailyStats = apps.get_model("bookings", "OrgDailyStats")
+    rows = {}
+    grouped = Appointment.objects.values_list("org_id", "date", "status").annotate(n=models.Count("id")).order_by()
+    for org_id, date, status, n in grouped:
+        if status in STAT_FIELDS:
+            row = rows.setdefault((org_id, date), OrgDailyStats(org_id=org_id, date=date))
+            setattr(row, STAT_FIELDS[status], n)
+    OrgDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0005_appointment_unique_active_slot"),
+        ("staff", "0010_organization_search_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrgDailyStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("booked", models.IntegerField(default=0)),
+                ("completed", models.IntegerField(default=0)),
+                ("missed", models.IntegerField(default=0)),
+                ("cancelled", models.IntegerField(default=0)),
+                ("org", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="daily_stats", to="staff.organization")),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("org", "date"), name="org_daily_stats_unique_day")],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0006_orgdailystats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["org", "updated_at"], name="appt_org_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["user", "date", "start_minute"], name="appt_user_date_start_idx"),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0008_appointment_date_index"),
+        ("staff", "0010_organization_search_fields"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedAppointment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("name", models.CharField(max_length=100)),
+                ("date", models.DateField()),
+                ("time_slot", models.CharField(max_length=20)),
+                ("start_minute", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("end_minute", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("phone", models.CharField(max_length=15)),
+                ("status", models.CharField(max_length=20)),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                ("org", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="staff.organization")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["org", "updated_at"], name="archived_org_updated_idx"), models.Index(fields=["user", "date", "start_minute"], name="archived_user_date_start_idx")],
+            },
+        ),
+    ]
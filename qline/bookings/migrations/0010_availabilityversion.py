@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0009_archivedappointment"),
+        ("staff", "0010_organization_search_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailabilityVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID"),
+                ),
+                ("date", models.DateField()),
+                ("version", models.PositiveIntegerField(default=0)),
+                (
+                    "org",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="+", to="staff.organization"
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("org", "date"), name="availability_version_unique_day")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0010_availabilityversion"),
+        ("staff", "0010_organization_search_fields"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="archivedappointment",
+            name="archived_org_updated_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="archivedappointment",
+            name="archived_user_date_start_idx",
+        ),
+        migrations.AddIndex(
+            model_name="archivedappointment",
+            index=models.Index(fields=["org", "updated_at", "id"], name="archived_org_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="archivedappointment",
+            index=models.Index(fields=["user", "date", "start_minute", "id"], name="archived_user_start_id_idx"),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from staff.models import Organization 
+from staff.schedule import parse_slot
 
 class Appointment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -8,10 +9,110 @@ class Appointment(models.Model):
     name = models.CharField(max_length=100)
     date = models.DateField()
     time_slot = models.CharField(max_length=20)
+    start_minute = models.PositiveSmallIntegerField(null=True, blank=True)
+    end_minute = models.PositiveSmallIntegerField(null=True, blank=True)
     phone = models.CharField(max_length=15)
     status = models.CharField(max_length=20, default="Booked")  
     updated_at = models.DateTimeField(auto_now=True) 
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["org", "date", "start_minute"], name="appt_org_date_start_idx"),
+            models.Index(fields=["org", "updated_at"], name="appt_org_updated_idx"),
+            models.Index(fields=["user", "date", "start_minute"], name="appt_user_date_start_idx"),
+            models.Index(fields=["date"], name="appt_date_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["org", "date", "start_minute"],
+                condition=~models.Q(status="Cancelled"),
+                name="appt_unique_active_slot",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.start_minute is None and self.time_slot:
+            try:
+                self.start_minute, self.end_minute = parse_slot(self.time_slot)
+            except ValueError:
+                pass
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} - {self.org.org_name} ({self.date} {self.time_slot})"
 
+
+
+class OrgDailyStats(models.Model):
+    """Per-(org, day) count of appointments in each status.
+
+    Maintained incrementally by bookings.counters.record_status_change and
+    rebuilt by the backfill_daily_stats management command.
+    """
+
+    org = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="daily_stats")
+    date = models.DateField()
+    booked = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    missed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["org", "date"], name="org_daily_stats_unique_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.org_id} {self.date}: {self.booked}/{self.completed}/{self.missed}/{self.cancelled}"
+
+
+class AvailabilityVersion(models.Model):
+    """Counter bumped whenever the free slots of an org on a day may change.
+
+    Cached slot grids are keyed by it. It lives in the database, not the
+    cache, so a bump made by one worker is seen by all of them.
+    """
+
+    org = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="+")
+    date = models.DateField()
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["org", "date"], name="availability_version_unique_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.org_id} {self.date}: v{self.version}"
+
+
+class ArchivedAppointment(models.Model):
+    """A finished appointment moved out of the hot Appointment table.
+
+    Rows keep their original id and are written by the archive_appointments
+    management command; history pages read both tables.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    org = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="+")
+    name = models.CharField(max_length=100)
+    date = models.DateField()
+    time_slot = models.CharField(max_length=20)
+    start_minute = models.PositiveSmallIntegerField(null=True, blank=True)
+    end_minute = models.PositiveSmallIntegerField(null=True, blank=True)
+    phone = models.CharField(max_length=15)
+    status = models.CharField(max_length=20)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # id is not a rowid alias here, so it must be in the index to
+            # order by it without a separate sort.
+            models.Index(fields=["org", "updated_at", "id"], name="archived_org_updated_id_idx"),
+            models.Index(fields=["user", "date", "start_minute", "id"], name="archived_user_start_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - {self.org.org_name} ({self.date} {self.time_slot}, archived)"
@@ -0,0 +1,146 @@
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+PAGE_SIZE = 25
+
+
+def _encode(values):
+    values = [v.isoformat() if hasattr(v, "isoformat") else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def _decode(cursor, fields):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if len(raw) != len(fields):
+            return None
+        return [None if v is None else field.to_python(v) for field, v in zip(fields, raw)]
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+
+
+class KeysetPage:
+    """One page of ``queryset`` in ``ordering`` order, starting after ``cursor``.
+
+    ``ordering`` must end in a unique field (normally ``id``) so every row has a
+    distinct position. The page costs the same at any depth because it seeks
+    with a WHERE on the ordering columns instead of an OFFSET. Rows are fetched
+    lazily on first use. Nullable columns sort NULLs first ascending and last
+    descending.
+
+    Besides the seek condition, the filter carries a plain bound on the first
+    ordering column so the database can start an index range scan at the
+    cursor instead of walking the index from the start.
+
+    ``queryset`` may also be a list of querysets over models sharing the
+    ordering fields (e.g. a table and its archive); each is read up to one
+    page and the results are merged, dropping repeated ids.
+    """
+
+    def __init__(self, queryset, ordering, cursor=None, page_size=PAGE_SIZE):
+        self.querysets = list(queryset) if isinstance(queryset, (list, tuple)) else [queryset]
+        self.queryset = self.querysets[0]
+        self.ordering = ordering
+        self.page_size = page_size
+        self._names = [field.lstrip("-") for field in ordering]
+        self._fields = [self.queryset.model._meta.get_field(name) for name in self._names]
+        self.cursor = cursor or None
+        self._after = _decode(cursor, self._fields) if cursor else None
+
+    def _order_by(self):
+        order = []
+        for spec, field in zip(self.ordering, self._fields):
+            if not field.null:
+                order.append(spec)
+            elif spec.startswith("-"):
+                order.append(F(field.name).desc(nulls_last=True))
+            else:
+                order.append(F(field.name).asc(nulls_first=True))
+        return order
+
+    def _seek(self):
+        conditions = []
+        equal = Q()
+        for spec, field, value in zip(self.ordering, self._fields, self._after):
+            name, desc = field.name, spec.startswith("-")
+            if value is None:
+                if not desc:
+                    conditions.append(equal & Q(**{f"{name}__isnull": False}))
+                equal &= Q(**{f"{name}__isnull": True})
+            else:
+                step = Q(**{f"{name}__{'lt' if desc else 'gt'}": value})
+                if desc and field.null:
+                    step |= Q(**{f"{name}__isnull": True})
+                conditions.append(equal & step)
+                equal &= Q(**{name: value})
+        if not conditions:
+            return Q(pk__in=[])
+        return self._bound() & reduce(or_, conditions)
+
+    def _bound(self):
+        # Implied by the seek condition, but only a range on the leading
+        # column lets the database seek into the index.
+        spec, field, value = self.ordering[0], self._fields[0], self._after[0]
+        if value is None:
+            return Q()
+        if not spec.startswith("-"):
+            return Q(**{f"{field.name}__gte": value})
+        bound = Q(**{f"{field.name}__lte": value})
+        if field.null:
+            bound |= Q(**{f"{field.name}__isnull": True})
+        return bound
+
+    def _fetch(self, queryset):
+        queryset = queryset.order_by(*self._order_by())
+        if self._after is not None:
+            queryset = queryset.filter(self._seek())
+        return list(queryset[:self.page_size + 1])
+
+    @cached_property
+    def _rows(self):
+        if len(self.querysets) == 1:
+            return self._fetch(self.queryset)
+
+        rows = {}
+        for queryset in self.querysets:
+            for row in self._fetch(queryset):
+                rows.setdefault(row.pk, row)
+        rows = list(rows.values())
+        # Stable sorts from the last key to the first, NULLs placed as in SQL.
+        for spec, field in reversed(list(zip(self.ordering, self._fields))):
+            rows.sort(
+                key=lambda row: (getattr(row, field.attname) is not None, getattr(row, field.attname)),
+                reverse=spec.startswith("-"),
+            )
+        return rows[:self.page_size + 1]
+
+    @property
+    def object_list(self):
+        return self._rows[:self.page_size]
+
+    @property
+    def has_next(self):
+        return len(self._rows) > self.page_size
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        last = self.object_list[-1]
+        return _encode([getattr(last, field.attname) for field in self._fields])
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
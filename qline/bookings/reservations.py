@@ -0,0 +1,65 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, OperationalError, transaction
+
+from .counters import record_status_change
+from .events import publish_appointment_event
+from .models import Appointment
+
+MAX_ACTIVE_PER_BRANCH = 2
+RESERVE_ATTEMPTS = 5
+
+
+class SlotTaken(Exception):
+    pass
+
+
+class BookingLimitReached(Exception):
+    pass
+
+
+def _reserve_once(user, org, date, start_minute, end_minute, **fields):
+    with transaction.atomic():
+        # Serializes one user's bookings on backends with row locks; SQLite
+        # already serializes writers and reports the loser as "locked".
+        User.objects.select_for_update().only("pk").get(pk=user.pk)
+
+        try:
+            appointment = Appointment.objects.create(
+                user=user,
+                org=org,
+                date=date,
+                start_minute=start_minute,
+                end_minute=end_minute,
+                status="Booked",
+                **fields,
+            )
+        except IntegrityError:
+            raise SlotTaken
+
+        # Counted after the insert so a concurrent booking is always visible.
+        if Appointment.objects.filter(user=user, org=org, status="Booked").count() > MAX_ACTIVE_PER_BRANCH:
+            raise BookingLimitReached
+
+        record_status_change(org.pk, date, None, appointment.status)
+        publish_appointment_event("booked", appointment)
+    return appointment
+
+
+def reserve_appointment(user, org, date, start_minute, end_minute, **fields):
+    """Atomically book a slot.
+
+    Raises SlotTaken when another active booking holds (org, date, start_minute)
+    and BookingLimitReached when the user already has the maximum number of
+    active bookings at this branch. Lock contention is retried briefly; the
+    last OperationalError is re-raised if it does not clear.
+    """
+    for attempt in range(RESERVE_ATTEMPTS):
+        try:
+            return _reserve_once(user, org, date, start_minute, end_minute, **fields)
+        except OperationalError:
+            if attempt == RESERVE_ATTEMPTS - 1:
+                raise
+            time.sleep(random.uniform(0.01, 0.05) * (attempt + 1))
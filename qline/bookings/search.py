@@ -0,0 +1,132 @@
+import bisect
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from staff.models import Organization, normalize_search
+
+# Rebuild at least this often so other workers pick up changes made elsewhere.
+LOCATION_INDEX_TTL = 300
+
+# Invalidation only reaches other workers through a shared cache (CACHE_SHARED);
+# with per-process caches, entries expire as soon as the location index does.
+BRANCH_SEARCH_TIMEOUT = 60 * 60
+BRANCH_SEARCH_LOCAL_TIMEOUT = LOCATION_INDEX_TTL
+BRANCH_SEARCH_FIELDS = ("id", "org_name", "branch_address", "working_hours")
+
+
+class LocationIndex:
+    """Sorted in-memory prefix index of distinct active-branch locations."""
+
+    def __init__(self):
+        self._keys = []
+        self._labels = []
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._built_at = None
+
+    def _build(self):
+        labels = {}
+        rows = Organization.objects.filter(is_active=True).values_list("location_search", "location").distinct()
+        for key, location in rows:
+            labels.setdefault(key, " ".join(location.split()))
+        keys = sorted(labels)
+        self._keys, self._labels = keys, [labels[key] for key in keys]
+        self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        built_at = self._built_at
+        if built_at is None or time.monotonic() - built_at > LOCATION_INDEX_TTL:
+            with self._lock:
+                if self._built_at == built_at:
+                    self._build()
+
+    def suggest(self, prefix, limit=10):
+        prefix = normalize_search(prefix)
+        if not prefix:
+            return []
+        self._ensure_fresh()
+        keys, labels = self._keys, self._labels
+        i = bisect.bisect_left(keys, prefix)
+        suggestions = []
+        while i < len(keys) and len(suggestions) < limit and keys[i].startswith(prefix):
+            suggestions.append(labels[i])
+            i += 1
+        return suggestions
+
+
+location_index = LocationIndex()
+
+
+class BranchSearchCache:
+    """Active branches per normalized (service_type, location), in the default cache.
+
+    Keys include a generation number kept in the cache; ``invalidate`` bumps it
+    so every cached search is dropped at once. That reaches other workers only
+    when the cache is shared (CACHE_SHARED); otherwise each worker's entries
+    expire after BRANCH_SEARCH_LOCAL_TIMEOUT, bounding how long it can show a
+    changed branch. Hit/miss counters are per process.
+    """
+
+    GENERATION_KEY = "branch-search:generation"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _new_generation(self):
+        # Seeded from the clock so a generation lost to eviction never reuses
+        # a number older entries may still be stored under.
+        cache.add(self.GENERATION_KEY, time.time_ns(), None)
+
+    def _generation(self):
+        generation = cache.get(self.GENERATION_KEY)
+        if generation is None:
+            self._new_generation()
+            generation = cache.get(self.GENERATION_KEY)
+        return generation
+
+    def timeout(self):
+        return BRANCH_SEARCH_TIMEOUT if getattr(settings, "CACHE_SHARED", False) else BRANCH_SEARCH_LOCAL_TIMEOUT
+
+    def invalidate(self):
+        try:
+            cache.incr(self.GENERATION_KEY)
+        except ValueError:
+            self._new_generation()
+
+    def search(self, service_type, location):
+        service_type, location = normalize_search(service_type), normalize_search(location)
+        # Hashed so spaces and non-ASCII in the search stay valid for memcached.
+        digest = hashlib.md5(f"{service_type}\0{location}".encode()).hexdigest()
+        key = f"branch-search:{self._generation()}:{digest}"
+        branches = cache.get(key)
+        with self._lock:
+            if branches is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if branches is None:
+            # From the primary: a lagging replica could refill the new
+            # generation with the list invalidate() just dropped.
+            branches = list(
+                Organization.objects.using(DEFAULT_DB_ALIAS).filter(
+                    service_type_search=service_type, location_search=location, is_active=True
+                ).order_by("id").values(*BRANCH_SEARCH_FIELDS)
+            )
+            cache.set(key, branches, self.timeout())
+        return branches
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+branch_search = BranchSearchCache()
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from staff.models import Organization
+from .search import branch_search, location_index
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def organization_changed(sender, **kwargs):
+    location_index.invalidate()
+    branch_search.invalidate()
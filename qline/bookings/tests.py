@@ -1,3 +1,466 @@
-from django.test import TestCase
+import threading
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import EmptyPage
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from qline.db_router import PIN_COOKIE, ReplicaPinMiddleware
+from qline.paginator import EstimatedCountPaginator, estimated_row_count
+from qline.testing import QueryBudgetTestCase, make_org
+
+from staff.models import Staff
+from staff.schedule import slot_label
+from .bulk import transition_appointment
+from .models import Appointment, ArchivedAppointment, OrgDailyStats
+from .pagination import KeysetPage
+from .search import branch_search, BRANCH_SEARCH_TIMEOUT, BRANCH_SEARCH_LOCAL_TIMEOUT
+from .reservations import reserve_appointment, SlotTaken, BookingLimitReached, MAX_ACTIVE_PER_BRANCH
+
+# A second alias for the same test database, so router tests can tell which
+# connection a query went through. Registered at import, before the test
+# databases are set up.
+REPLICA = "replica_under_test"
+connections.settings[REPLICA] = {
+    **connections.settings["default"],
+    "TEST": {**connections.settings["default"]["TEST"], "MIRROR": "default"},
+}
+
+
+def reserve(user, org, start_minute):
+    return reserve_appointment(
+        user, org, date(2030, 1, 1), start_minute, start_minute + 10,
+        name="Test", time_slot="", phone="9876543210",
+    )
+
+
+class ReserveAppointmentTests(TestCase):
+    def setUp(self):
+        self.org = make_org(Staff.objects.create(email="staff@example.com"))
+        self.user = User.objects.create(username="a@example.com")
+        self.other = User.objects.create(username="b@example.com")
+
+    def test_taken_slot_is_rejected(self):
+        reserve(self.user, self.org, 540)
+        with self.assertRaises(SlotTaken):
+            reserve(self.other, self.org, 540)
+
+    def test_cancelled_slot_can_be_booked_again(self):
+        appointment = reserve(self.user, self.org, 540)
+        appointment.status = "Cancelled"
+        appointment.save()
+        reserve(self.other, self.org, 540)
+        self.assertEqual(Appointment.objects.filter(start_minute=540, status="Booked").count(), 1)
+
+    def test_active_booking_limit(self):
+        for i in range(MAX_ACTIVE_PER_BRANCH):
+            reserve(self.user, self.org, 540 + 10 * i)
+        with self.assertRaises(BookingLimitReached):
+            reserve(self.user, self.org, 700)
+        self.assertEqual(Appointment.objects.filter(user=self.user).count(), MAX_ACTIVE_PER_BRANCH)
+
+
+class TransitionAppointmentTests(TestCase):
+    def setUp(self):
+        self.org = make_org(Staff.objects.create(email="staff@example.com"))
+        self.user = User.objects.create(username="a@example.com")
+
+    def test_racing_transitions_are_counted_once(self):
+        reserve(self.user, self.org, 540)
+        # Two requests load the same Booked appointment before either writes.
+        first, second = Appointment.objects.get(), Appointment.objects.get()
+
+        self.assertTrue(transition_appointment(first, "Completed", "served"))
+        self.assertFalse(transition_appointment(second, "Missed", "skipped"))
+
+        self.assertEqual(Appointment.objects.get().status, "Completed")
+        stats = OrgDailyStats.objects.get(org=self.org)
+        self.assertEqual((stats.booked, stats.completed, stats.missed), (0, 1, 0))
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        self.org = make_org(Staff.objects.create(email="staff@example.com"))
+        self.user = User.objects.create(username="a@example.com")
+        self.client.force_login(self.user)
+        self.url = reverse("active_appointment")
+
+    def get_tables_read(self, url):
+        """GET ``url``; return the response and the tables read on the primary and on the replica."""
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get(url)
+
+        def tables(queries):
+            return {query["sql"].split('"')[1] for query in queries if query["sql"].startswith("SELECT")}
+
+        return response, tables(primary), tables(replica)
+
+    def test_reads_go_to_the_replica(self):
+        response, primary, replica = self.get_tables_read(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("bookings_appointment", replica)
+        self.assertNotIn("bookings_appointment", primary)
+        # Sessions are always read from the primary.
+        self.assertIn("django_session", primary)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_writes_go_to_the_primary_and_pin_the_rest_of_the_request(self):
+        appointment = reserve(self.user, self.org, 540)
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.post(reverse("cancel_appointment", args=[appointment.id]))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(replica), 0)
+        self.assertEqual(Appointment.objects.using("default").get().status, "Cancelled")
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_reads_after_a_write_in_a_safe_request_use_the_primary(self):
+        def view(request):
+            list(Appointment.objects.all())
+            User.objects.filter(pk=self.user.pk).update(first_name="Test")
+            list(Appointment.objects.all())
+            return HttpResponse()
+
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = ReplicaPinMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual([q["sql"].split()[0] for q in replica], ["SELECT"])
+        self.assertEqual([q["sql"].split()[0] for q in primary], ["UPDATE", "SELECT"])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_branch_search_misses_read_the_primary(self):
+        cache.clear()
+
+        def view(request):
+            branch_search.search("clinic", "Pune")
+            return HttpResponse()
+
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            ReplicaPinMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(len(replica), 0)
+        self.assertEqual([branch["id"] for branch in branch_search.search("clinic", "Pune")], [self.org.id])
+
+    def test_pinned_client_reads_from_the_primary(self):
+        self.client.cookies[PIN_COOKIE] = "1"
+        _, primary, replica = self.get_tables_read(self.url)
+        self.assertIn("bookings_appointment", primary)
+        self.assertEqual(replica, set())
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    # Needs the file-backed test database (settings DATABASES TEST NAME), where
+    # competing writers wait on busy_timeout rather than failing at once.
+    THREADS = 24
+
+    def setUp(self):
+        self.org = make_org(Staff.objects.create(email="staff@example.com"))
+
+    def run_concurrently(self, attempts):
+        barrier = threading.Barrier(len(attempts))
+        outcomes = []
+
+        def worker(user, start_minute):
+            try:
+                barrier.wait()
+                reserve(user, self.org, start_minute)
+                outcomes.append("booked")
+            except Exception as exc:
+                # Recorded rather than lost with the thread, so the test sees it.
+                outcomes.append(type(exc).__name__)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=attempt) for attempt in attempts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_no_double_booking_of_one_slot(self):
+        users = [
+            User.objects.create(username=f"user{i}@example.com")
+            for i in range(self.THREADS)
+        ]
+        outcomes = self.run_concurrently([(user, 540) for user in users])
+
+        self.assertEqual(outcomes.count("booked"), 1)
+        self.assertEqual(set(outcomes) - {"booked"}, {"SlotTaken"})
+        self.assertEqual(Appointment.objects.filter(date=date(2030, 1, 1), start_minute=540).count(), 1)
+
+    def test_booking_limit_holds_under_concurrency(self):
+        user = User.objects.create(username="solo@example.com")
+        outcomes = self.run_concurrently([(user, 540 + 10 * i) for i in range(self.THREADS)])
+
+        self.assertEqual(outcomes.count("booked"), MAX_ACTIVE_PER_BRANCH)
+        self.assertEqual(set(outcomes) - {"booked"}, {"BookingLimitReached"})
+        self.assertEqual(Appointment.objects.filter(user=user, status="Booked").count(), MAX_ACTIVE_PER_BRANCH)
+
+
+class KeysetPageTests(QueryBudgetTestCase):
+    def add(self, *rows, status="Cancelled"):
+        # (date, start_minute) pairs; cancelled rows may share a slot.
+        return [
+            appointment.id for appointment in Appointment.objects.bulk_create(
+                Appointment(user=self.user, org=self.org, name="Test", phone="9876543210", date=day,
+                            time_slot="", start_minute=start, status=status)
+                for day, start in rows
+            )
+        ]
+
+    def walk(self, queryset, ordering, page_size=2):
+        ids, cursor = [], None
+        while True:
+            page = KeysetPage(queryset, ordering, cursor, page_size=page_size)
+            ids.extend(row.id for row in page)
+            if not page.has_next:
+                return ids
+            cursor = page.next_cursor
+
+    def test_ties_across_page_boundaries(self):
+        day = date(2030, 1, 1)
+        ids = self.add((day, 540), (day, 540), (day, 540), (day, 530), (day, 540))
+        expected = [ids[3], ids[0], ids[1], ids[2], ids[4]]
+        self.assertEqual(self.walk(Appointment.objects.all(), ["date", "start_minute", "id"]), expected)
+        self.assertEqual(
+            self.walk(Appointment.objects.all(), ["-date", "-start_minute", "-id"]), expected[::-1]
+        )
+
+    def test_null_start_minutes(self):
+        day = date(2030, 1, 1)
+        ids = self.add((day, 540), (day, None), (day, 530), (day, None), (day + timedelta(days=1), None))
+        # NULLs sort first ascending and last descending.
+        self.assertEqual(
+            self.walk(Appointment.objects.all(), ["date", "start_minute", "id"]),
+            [ids[1], ids[3], ids[2], ids[0], ids[4]],
+        )
+        self.assertEqual(
+            self.walk(Appointment.objects.all(), ["date", "-start_minute", "id"]),
+            [ids[0], ids[2], ids[1], ids[3], ids[4]],
+        )
+
+    def test_mixed_directions(self):
+        first, second = date(2030, 1, 1), date(2030, 1, 2)
+        ids = self.add((first, 540), (second, 540), (first, 530), (second, 530), (second, 530))
+        self.assertEqual(
+            self.walk(Appointment.objects.all(), ["-date", "start_minute", "id"], page_size=1),
+            [ids[3], ids[4], ids[1], ids[2], ids[0]],
+        )
+
+    def test_invalid_cursors_start_from_the_first_page(self):
+        ids = self.add(*((date(2030, 1, 1), 540 + i) for i in range(3)))
+        ordering = ["date", "start_minute", "id"]
+        first_page = [ids[0], ids[1]]
+        valid = KeysetPage(Appointment.objects.all(), ordering, page_size=2).next_cursor
+        for cursor in ["garbage!", "e30", valid[:-3], "WyIyMDMwLTAxLTAxIl0", "WyJ4IiwgMSwgMV0"]:
+            with self.subTest(cursor=cursor):
+                page = KeysetPage(Appointment.objects.all(), ordering, cursor, page_size=2)
+                self.assertEqual([row.id for row in page], first_page)
+
+    def test_merges_hot_and_archived_rows_across_pages(self):
+        hot = self.add(*((date(2030, 1, 1), 540 + i) for i in range(3)), status="Completed")
+        for i, appointment_id in enumerate(hot):
+            Appointment.objects.filter(id=appointment_id).update(updated_at=f"2030-01-0{2 * i + 1}T00:00:00Z")
+        archived = [10_000_000 + i for i in range(3)]
+        ArchivedAppointment.objects.bulk_create(
+            ArchivedAppointment(
+                id=appointment_id, user=self.user, org=self.org, name="Old", phone="9876543210",
+                date=date(2029, 1, 1), time_slot="", status="Missed", updated_at=f"2030-01-0{2 * i + 2}T00:00:00Z",
+            )
+            for i, appointment_id in enumerate(archived)
+        )
+        # Caught mid-archive: also present in the archive, listed once.
+        ArchivedAppointment.objects.create(
+            id=hot[0], user=self.user, org=self.org, name="Test", phone="9876543210", date=date(2030, 1, 1),
+            time_slot="", status="Completed", updated_at="2030-01-01T00:00:00Z",
+        )
+
+        querysets = [Appointment.objects.all(), ArchivedAppointment.objects.all()]
+        self.assertEqual(
+            self.walk(querysets, ["-updated_at", "-id"]),
+            [archived[2], hot[2], archived[1], hot[1], archived[0], hot[0]],
+        )
+
+
+    def test_deep_pages_seek_into_the_index(self):
+        self.add(*((date(2030, 1, 1), 540 + i) for i in range(3)), status="Completed")
+        cursor = KeysetPage(Appointment.objects.all(), ["-updated_at", "-id"], page_size=1).next_cursor
+        for queryset in [Appointment.objects.filter(org=self.org), ArchivedAppointment.objects.filter(org=self.org)]:
+            with self.subTest(model=queryset.model.__name__):
+                page = KeysetPage(queryset, ["-updated_at", "-id"], cursor, page_size=1)
+                plan = queryset.order_by(*page._order_by()).filter(page._seek())[:2].explain()
+                self.assertIn("updated_at<?", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+@mock.patch("qline.paginator.ESTIMATE_THRESHOLD", 10)
+class EstimatedCountPaginatorTests(QueryBudgetTestCase):
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_exact_count_without_statistics(self):
+        self.add_appointments(30)
+        self.assertIsNone(estimated_row_count(Appointment))
+        self.assertEqual(EstimatedCountPaginator(Appointment.objects.all(), 10).count, 30)
+
+    def test_estimate_after_deleting_rows(self):
+        self.add_appointments(30, status="Completed", day=date(2020, 1, 1))
+        self.add_appointments(20)
+        self.analyze()
+        self.assertEqual(estimated_row_count(Appointment), 50)
+
+        # The estimate is stale now; pages past the real end recount.
+        Appointment.objects.filter(status="Completed").delete()
+        paginator = EstimatedCountPaginator(Appointment.objects.order_by("id"), 10)
+        self.assertEqual(paginator.count, 50)
+        self.assertEqual(len(paginator.page(2).object_list), 10)
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+        self.assertEqual((paginator.count, paginator.num_pages), (20, 2))
+
+    def test_archiving_refreshes_statistics(self):
+        self.add_appointments(30, status="Completed", day=date(2020, 1, 1))
+        self.add_appointments(20)
+        self.analyze()
+        call_command("archive_appointments", stdout=mock.Mock())
+        self.assertEqual(estimated_row_count(Appointment), 20)
+        self.assertEqual(estimated_row_count(ArchivedAppointment), 30)
+
+
+class AppointmentAdminTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create(username="admin", is_staff=True, is_superuser=True))
+        self.url = reverse("admin:bookings_appointment_changelist")
+
+    def test_changelist(self):
+        self.assertQueryBudget(5, self.url, lambda n: self.add_appointments(n, spread_days=True))
+
+    def test_filters_do_not_scan_for_distinct_values(self):
+        self.add_appointments(3, spread_days=True)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"status__exact": "Booked", "date__gte": date.today().isoformat()})
+        self.assertContains(response, "Booked")
+        self.assertFalse([query["sql"] for query in queries if "DISTINCT" in query["sql"]])
+
+    def stats(self, day):
+        return OrgDailyStats.objects.filter(org=self.org, date=day).values("booked", "completed", "cancelled").get()
+
+    def test_edits_keep_the_daily_rollup_in_step(self):
+        appointment = reserve(self.user, self.org, 540)
+        day = appointment.date
+        change_url = reverse("admin:bookings_appointment_change", args=[appointment.id])
+        data = {
+            "user": self.user.id, "org": self.org.id, "name": "Test", "date": day.isoformat(),
+            "time_slot": slot_label(540, 550), "start_minute": 540, "end_minute": 550,
+            "phone": "9876543210", "status": "Completed",
+        }
+        self.assertEqual(self.client.post(change_url, data).status_code, 302)
+        self.assertEqual(self.stats(day), {"booked": 0, "completed": 1, "cancelled": 0})
+
+        moved = day + timedelta(days=1)
+        self.client.post(change_url, {**data, "date": moved.isoformat()})
+        self.assertEqual(self.stats(day), {"booked": 0, "completed": 0, "cancelled": 0})
+        self.assertEqual(self.stats(moved), {"booked": 0, "completed": 1, "cancelled": 0})
+
+        self.client.post(reverse("admin:bookings_appointment_delete", args=[appointment.id]), {"post": "yes"})
+        self.assertFalse(Appointment.objects.exists())
+        self.assertEqual(self.stats(moved), {"booked": 0, "completed": 0, "cancelled": 0})
+
+    def test_invalid_org_filter(self):
+        response = self.client.get(self.url, {"org__id__exact": "abc"})
+        self.assertRedirects(response, f"{self.url}?e=1", fetch_redirect_response=False)
+
+class BranchSearchCacheTests(TestCase):
+    def test_entries_outlive_the_location_index_only_with_a_shared_cache(self):
+        with override_settings(CACHE_SHARED=False):
+            self.assertEqual(branch_search.timeout(), BRANCH_SEARCH_LOCAL_TIMEOUT)
+        with override_settings(CACHE_SHARED=True):
+            self.assertEqual(branch_search.timeout(), BRANCH_SEARCH_TIMEOUT)
+
+
+class OrgEventsTests(TestCase):
+    def setUp(self):
+        self.org = make_org(Staff.objects.create(email="staff@example.com"))
+        self.user = User.objects.create(username="a@example.com")
+        self.url = reverse("org_events", args=[self.org.id])
+
+    def test_not_streamed_under_wsgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    async def test_streamed_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+        await stream.aclose()
+
+    @override_settings(WEB_CONCURRENCY=4)
+    async def test_not_streamed_with_several_workers_and_in_process_broker(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 204)
+
+
+class BookingViewQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_user()
+
+    def add_branches(self, n):
+        # Each branch gets one active booking so templates that follow appointment.org are exercised.
+        for i in range(n):
+            branch = make_org(self.staff, location=f"Pune {i}" if i % 2 else "Pune")
+            self.add_appointments(1, org=branch, day=date.today() + timedelta(days=1))
+
+    def test_book_appointment(self):
+        self.assertQueryBudget(2, f"{reverse('book_appointment')}?service_type=clinic&location=pune", self.add_branches)
+
+    def test_suggest_locations(self):
+        self.assertQueryBudget(2, f"{reverse('suggest_locations')}?q=pu", self.add_branches)
+
+    def test_active_appointments(self):
+        self.assertQueryBudget(3, reverse("active_appointment"), self.add_branches)
+
+    def test_history(self):
+        def grow(n):
+            self.add_appointments(n, status="Completed", day=date(2020, 1, 1))
+            ArchivedAppointment.objects.bulk_create(
+                ArchivedAppointment(
+                    id=10_000_000 + ArchivedAppointment.objects.count() + i, user=self.user, org=make_org(self.staff),
+                    name="Test", phone="9876543210", date=date(2019, 1, 1), time_slot="", status="Missed",
+                    updated_at="2019-01-01T00:00:00Z",
+                )
+                for i in range(n)
+            )
+
+        self.assertQueryBudget(4, reverse("history"), grow)
+
+    def test_cancel(self):
+        appointments = iter(self.add_appointments(2 * len(self.SIZES), day=date.today() + timedelta(days=1)))
+        self.assertQueryBudget(
+            8, lambda: reverse("cancel_appointment", args=[next(appointments).id]), method="post", status=302,
+        )
+
+    def test_org_events(self):
+        # Served as a 204 outside ASGI; the checks before streaming are the same.
+        self.assertQueryBudget(3, reverse("org_events", args=[self.org.id]), self.add_branches, status=204)
+
+    def test_branch_search_stats(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.assertQueryBudget(2, reverse("branch_search_stats"), self.add_branches)
@@ -3,7 +3,10 @@ from . import views
 
 urlpatterns = [
     path('book/', views.book_appointment, name='book_appointment'),
+    path('search/stats/', views.branch_search_stats, name='branch_search_stats'),
+    path('locations/suggest/', views.suggest_locations, name='suggest_locations'),
     path('active_appointments/', views.active_appointments, name='active_appointment'),
     path("cancel/<int:appointment_id>/", views.cancel_appointment, name="cancel_appointment"),
     path('history/', views.appointment_history, name='history'),
+    path('events/<int:org_id>/', views.org_events, name='org_events'),
 ]
\ No newline at end of file
@@ -1,8 +1,17 @@
+import asyncio
+import json
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, HttpResponseForbidden, Http404
 from staff.models import Organization  # import staff's org
-from bookings.models import Appointment
+from bookings.models import Appointment, ArchivedAppointment
+from bookings.search import branch_search, location_index
+from bookings.bulk import transition_appointment
+from bookings.pagination import KeysetPage
+from bookings.events import get_broker, live_events_available
 
 
 @login_required
@@ -12,12 +21,8 @@ def book_appointment(request):
     branches = []
 
     if service_type and location:
-        branches = Organization.objects.filter(
-            service_type__iexact=service_type,
-            location__iexact=location,
-            is_active=True
-        )
-        
+        branches = branch_search.search(service_type, location)
+
     context = {
         "branches": branches,
         "selected_service": service_type,
@@ -26,12 +31,22 @@ def book_appointment(request):
     return render(request, "bookings/book_appointment.html", context)
 
 
+@login_required
+def suggest_locations(request):
+    return JsonResponse({"suggestions": location_index.suggest(request.GET.get("q", ""))})
+
+
+@staff_member_required
+def branch_search_stats(request):
+    return JsonResponse(branch_search.stats())
+
+
 @login_required
 def active_appointments(request):
     active_appointments = Appointment.objects.filter(
         user=request.user,
         status="Booked"
-    ).order_by("date", "time_slot")
+    ).select_related("org").order_by("date", "start_minute")
 
     return render(request, "bookings/active_appointment.html", {
         "active_appointments": active_appointments
@@ -42,20 +57,60 @@ def active_appointments(request):
 def cancel_appointment(request, appointment_id):
     appointment = get_object_or_404(Appointment, id=appointment_id, user=request.user)
     if request.method == "POST":
-        appointment.status = "Cancelled"
-        appointment.save()
-        messages.success(request, "Appointment cancelled successfully.")
+        if transition_appointment(appointment, "Cancelled", "cancelled"):
+            messages.success(request, "Appointment cancelled successfully.")
+        else:
+            messages.info(request, "This appointment was already updated.")
     return redirect("active_appointment")
 
 
 
 @login_required
 def appointment_history(request):
-    past_appointments = Appointment.objects.filter(
-        user=request.user
-    ).exclude(status="Booked").order_by("-date", "-time_slot")
+    past_appointments = [
+        Appointment.objects.filter(user=request.user).exclude(status="Booked").select_related("org"),
+        ArchivedAppointment.objects.filter(user=request.user).select_related("org"),
+    ]
 
     return render(request, 'bookings/history.html', {
-        "past_appointments": past_appointments
+        "past_appointments": KeysetPage(past_appointments, ["-date", "-start_minute", "-id"], request.GET.get("cursor"))
     })
 
+
+EVENT_KEEPALIVE_SECONDS = 15
+
+
+async def org_events(request, org_id):
+    """Server-sent events for one organization.
+
+    Only served through qline.asgi: under WSGI the endless stream would hold a
+    worker thread and never send a byte. There, and when the broker can't
+    reach every worker, it answers 204, which tells EventSource to stop
+    reconnecting; pages then simply don't update live.
+    """
+    user = await request.auser()
+    if not user.is_authenticated and not await request.session.aget("staff_id"):
+        return HttpResponseForbidden()
+    if not await Organization.objects.filter(id=org_id).aexists():
+        raise Http404
+    if not isinstance(request, ASGIRequest) or not live_events_available():
+        return HttpResponse(status=204)
+
+    async def stream():
+        subscription = get_broker().subscribe(org_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await subscription.get(timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,18 @@
+# Picked up automatically by gunicorn when started from this directory.
+import os
+import shutil
+
+# Workers write their Prometheus metrics here so /metrics can merge them. Set
+# before prometheus_client is imported anywhere.
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/qline-metrics")
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
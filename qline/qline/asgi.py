@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "qline.settings")
 
 application = get_asgi_application()
+
+from bookings.expiry import start_expiry_scheduler  # noqa: E402
+
+start_expiry_scheduler()
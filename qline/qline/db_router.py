@@ -0,0 +1,81 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "qline_primary"
+
+# Apps whose reads must always see the latest write (e.g. a session saved by
+# the previous request).
+PRIMARY_ONLY_APPS = {"sessions"}
+
+
+class _RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_request_state = ContextVar("qline_db_request_state", default=None)
+
+
+class PrimaryReplicaRouter:
+    """Send reads made while serving a request to a replica from DATABASE_REPLICAS.
+
+    Reads go to the primary when there are no replicas, outside a request
+    (management commands, shell), inside a transaction, for PRIMARY_ONLY_APPS,
+    and for the rest of a request once it has written. ReplicaPinMiddleware
+    also pins unsafe requests and, for REPLICA_PIN_SECONDS after a write, the
+    same client's following requests so replication lag can't hide their own
+    changes.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        state = _request_state.get()
+        if (
+            not replicas
+            or state is None
+            or state.pinned
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE"}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState(
+            pinned=request.method not in self.SAFE_METHODS or PIN_COOKIE in request.COOKIES
+        )
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5), httponly=True, samesite="Lax"
+            )
+        return response
@@ -0,0 +1,104 @@
+import logging
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest, multiprocess
+
+logger = logging.getLogger("qline.requests")
+
+REQUEST_SECONDS = Histogram(
+    "qline_request_duration_seconds", "Wall time per request.", ["view", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_SECONDS = Histogram(
+    "qline_request_db_seconds", "Time spent in SQL per request.", ["view"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+QUERIES = Histogram(
+    "qline_request_queries", "SQL queries per request.", ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+# Statements included in a slow-request log line.
+SLOW_LOG_MAX_QUERIES = 50
+
+
+class _QueryTimer:
+    """Execute wrapper that totals SQL time and keeps the statements."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - began
+            self.seconds += elapsed
+            self.queries.append((elapsed, sql))
+
+
+class RequestMetricsMiddleware:
+    """Time every request, per URL name, into the Prometheus histograms.
+
+    Adds a Server-Timing header (total, db) and logs requests slower than
+    SLOW_REQUEST_MS with their SQL. For streaming responses only the time
+    to the first byte is measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        began = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - began
+
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else "<unmatched>"
+        REQUEST_SECONDS.labels(view, request.method, response.status_code).observe(elapsed)
+        DB_SECONDS.labels(view).observe(timer.seconds)
+        QUERIES.labels(view).observe(len(timer.queries))
+
+        response["Server-Timing"] = (
+            f'total;dur={elapsed * 1000:.1f}, db;dur={timer.seconds * 1000:.1f};desc="{len(timer.queries)} queries"'
+        )
+        if elapsed * 1000 >= getattr(settings, "SLOW_REQUEST_MS", 500):
+            logger.warning(
+                "Slow request %s %s (%s): %.0f ms, %d queries, %.0f ms in SQL\n%s",
+                request.method, request.path, view, elapsed * 1000, len(timer.queries), timer.seconds * 1000,
+                "\n".join(f"  {seconds * 1000:7.1f} ms  {sql}" for seconds, sql in timer.queries[:SLOW_LOG_MAX_QUERIES]),
+            )
+        return response
+
+
+def metrics(request):
+    """Prometheus scrape endpoint, for admin staff or a METRICS_TOKEN bearer token.
+
+    Under Gunicorn (see gunicorn.conf.py) PROMETHEUS_MULTIPROC_DIR is set and
+    the histograms of all workers are merged.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    authorization = request.headers.get("Authorization", "")
+    if not (
+        (token and constant_time_compare(authorization, f"Bearer {token}"))
+        or (request.user.is_authenticated and request.user.is_staff)
+    ):
+        return HttpResponseForbidden()
+
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,68 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+# Below this size an exact COUNT(*) is cheap enough to keep.
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimated_row_count(model, using="default"):
+    """Cheap row-count estimate for ``model``'s table, or None if unsupported."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            # Row count from the last ANALYZE ("<rows> ..." per index). Without
+            # statistics there is no cheap estimate: MAX(rowid) overshoots once
+            # rows are deleted.
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the size of large unfiltered querysets.
+
+    Filtered querysets and small tables still get an exact count, and so
+    does a request for a page past the real end of an overestimated table.
+    """
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    def page(self, number):
+        page = super().page(number)
+        if self.estimated and not page.object_list and page.number > 1:
+            # The estimate was too high; count for real and validate again.
+            self.estimated = False
+            self.__dict__["count"] = Paginator.count.func(self)
+            self.__dict__.pop("num_pages", None)
+            page = super().page(number)
+        return page
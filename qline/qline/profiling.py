@@ -0,0 +1,140 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger("qline.profiling")
+
+PROFILE_PARAM = "profile"
+PROFILE_HEADER = "X-Profile-Token"
+TOKEN_SALT = "qline.profiling"
+TOP_FUNCTIONS = 40
+
+
+def make_profile_token():
+    """Signed token that lets the bearer profile requests until it expires."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def _valid_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=getattr(settings, "PROFILE_TOKEN_MAX_AGE", 3600))
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class _SQLTimeline:
+    def __init__(self, began):
+        self.began = began
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.entries.append({
+                "start_ms": round((start - self.began) * 1000, 3),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                "sql": sql,
+            })
+
+
+def _template_seconds(stats):
+    # Cumulative time of Template.render; pstats already folds nested (included) renders in.
+    code = Template.render.__code__
+    entry = stats.stats.get((code.co_filename, code.co_firstlineno, code.co_name))
+    return entry[3] if entry else 0.0
+
+
+class ProfilingMiddleware:
+    """Run selected requests under cProfile and save the results to PROFILE_DIR.
+
+    A request is profiled when it carries ``?profile=1`` from an admin, a
+    valid token (``?profile=<token>`` or the X-Profile-Token header, minted
+    with ``manage.py profile_token``), or when it falls in the random
+    PROFILE_SAMPLE_RATE share of traffic. Each profile writes a ``.prof``
+    pstats file (for snakeviz, flameprof or ``python -m pstats``) and a
+    ``.json`` summary with the SQL timeline, template render time and top
+    functions; on-demand profiles name them in an X-Profile-Id header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def requested(self, request):
+        value = request.GET.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER)
+        if not value:
+            return False
+        if value == "1":
+            return request.user.is_authenticated and request.user.is_staff
+        return _valid_token(value)
+
+    def __call__(self, request):
+        on_demand = self.requested(request)
+        if not on_demand and random.random() >= getattr(settings, "PROFILE_SAMPLE_RATE", 0):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        began = time.perf_counter()
+        timeline = _SQLTimeline(began)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timeline))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - began
+
+        try:
+            profile_id = self.save(request, profiler, timeline, elapsed, on_demand)
+        except OSError:
+            logger.exception("Could not save request profile")
+            return response
+        if on_demand:
+            response["X-Profile-Id"] = profile_id
+        return response
+
+    def save(self, request, profiler, timeline, elapsed, on_demand):
+        directory = Path(getattr(settings, "PROFILE_DIR", "/tmp/qline-profiles"))
+        directory.mkdir(parents=True, exist_ok=True)
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        profile_id = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{view}-{os.getpid()}"
+
+        profiler.dump_stats(directory / f"{profile_id}.prof")
+        stats = pstats.Stats(profiler)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        summary = {
+            "id": profile_id,
+            "path": request.get_full_path(),
+            "method": request.method,
+            "view": view,
+            "trigger": "on_demand" if on_demand else "sample",
+            "wall_ms": round(elapsed * 1000, 3),
+            "sql_ms": round(sum(entry["duration_ms"] for entry in timeline.entries), 3),
+            "template_ms": round(_template_seconds(stats) * 1000, 3),
+            "sql": timeline.entries,
+            "top_functions": [
+                {"function": f"{filename}:{line}({name})", "calls": calls, "tottime_ms": round(tottime * 1000, 3),
+                 "cumtime_ms": round(cumtime * 1000, 3)}
+                for (filename, line, name), (_, calls, tottime, cumtime, _) in top
+            ],
+        }
+        (directory / f"{profile_id}.json").write_text(json.dumps(summary, indent=2))
+        logger.info("Saved profile %s (%.0f ms)", profile_id, elapsed * 1000)
+        return profile_id
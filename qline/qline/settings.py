@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,12 +46,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "qline.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "qline.db_router.ReplicaPinMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     'whitenoise.middleware.WhiteNoiseMiddleware',
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "staff.context.StaffContextMiddleware",
+    "qline.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -81,10 +86,70 @@ WSGI_APPLICATION = "qline.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get("QLINE_SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        # A file, not Django's default shared-cache in-memory database: there
+        # lock conflicts fail at once instead of waiting out busy_timeout, so
+        # the concurrent booking tests could not show one writer winning.
+        "TEST": {"NAME": os.environ.get("QLINE_TEST_SQLITE_PATH", BASE_DIR / "test_db.sqlite3")},
     }
 }
 
+# "production" tunes SQLite for several Gunicorn workers writing at once:
+# WAL lets readers run alongside the writer, busy_timeout/timeout make writers
+# queue instead of failing with "database is locked", and IMMEDIATE takes the
+# write lock at BEGIN so two transactions can't deadlock upgrading from a read.
+# Set QLINE_DB_PROFILE=default for SQLite's stock behaviour.
+DB_PROFILE = os.environ.get("QLINE_DB_PROFILE", "production")
+
+SQLITE_PRODUCTION_OPTIONS = {
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA busy_timeout=20000;"
+        "PRAGMA mmap_size=134217728;"
+        "PRAGMA cache_size=-20000;"
+        "PRAGMA temp_store=MEMORY;"
+    ),
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 20,
+}
+
+if DB_PROFILE == "production":
+    DATABASES["default"]["OPTIONS"] = SQLITE_PRODUCTION_OPTIONS
+
+# Read replicas: comma-separated SQLite paths kept in sync with the primary
+# (locally by `manage.py sync_replicas`). Reads during a request are spread
+# across them by qline.db_router; writes always go to "default".
+DATABASE_REPLICAS = []
+for i, path in enumerate(p for p in os.environ.get("QLINE_SQLITE_REPLICAS", "").split(",") if p.strip()):
+    alias = f"replica{i + 1}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "NAME": path.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["qline.db_router.PrimaryReplicaRouter"]
+
+# How long a client keeps reading from the primary after it writes.
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache shared by all workers, e.g. redis://127.0.0.1:6379/1 (needs the
+# redis package). Without it every process has its own LocMemCache, so an
+# invalidation only reaches the process that made it; code caching data other
+# workers can change checks CACHE_SHARED and keeps its entries short-lived.
+CACHE_URL = os.environ.get("QLINE_CACHE_URL")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+CACHE_SHARED = bool(CACHE_URL)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,5 +200,50 @@ LOGIN_REDIRECT_URL = 'dashboard'
 
 LOGOUT_REDIRECT_URL = 'user_login'  
 
+# Serve the staff dashboard's all-time completed/missed totals from the cache
+# instead of counting history. Only enable with a cache shared by all workers.
+DASHBOARD_COUNTER_CACHE = False
+
+# Pub/sub backend for the live booking/queue event streams. The in-process
+# broker only reaches clients connected to the same server process, so the
+# streams are switched off with it when there is more than one.
+EVENT_BROKER = "bookings.events.InProcessBroker"
+
+# Web server worker processes; gunicorn reads the same variable.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+# Seconds between in-process runs of the past-appointment expiry; None leaves
+# it to `manage.py expire_appointments` (e.g. from cron).
+APPOINTMENT_EXPIRY_INTERVAL = None
+
+# Finished appointments older than this many days are moved to the archive
+# table by `manage.py archive_appointments`.
+APPOINTMENT_ARCHIVE_DAYS = 90
+
+# Requests slower than this are logged with their SQL.
+SLOW_REQUEST_MS = 500
+
+# Bearer token accepted by /metrics besides a logged-in admin.
+METRICS_TOKEN = os.environ.get("QLINE_METRICS_TOKEN")
+
+# Request profiling (qline.profiling): output directory, lifetime of tokens
+# from `manage.py profile_token`, and the share of ordinary requests profiled.
+PROFILE_DIR = os.environ.get("QLINE_PROFILE_DIR", "/tmp/qline-profiles")
+PROFILE_TOKEN_MAX_AGE = 3600
+PROFILE_SAMPLE_RATE = float(os.environ.get("QLINE_PROFILE_SAMPLE_RATE", "0"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"qline": {"handlers": ["console"], "level": "INFO"}},
+}
+
+# Sessions are read from the cache and only fall back to the database on a
+# miss, but only with a shared cache: with per-process caches a worker could
+# keep serving a session another worker has already logged out.
+SESSION_ENGINE = (
+    "django.contrib.sessions.backends.cached_db" if CACHE_SHARED else "django.contrib.sessions.backends.db"
+)
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_AGE = 1209600  
\ No newline at end of file
@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from bookings.models import Appointment
+from bookings.search import location_index
+from staff import schedule
+from staff.models import Staff, Organization, TimeSlot, Holiday
+from staff.schedule import bump_schedule_version, format_time
+
+
+def make_org(staff, **fields):
+    return Organization.objects.create(**{
+        "staff": staff,
+        "org_name": "City Clinic",
+        "service_type": "clinic",
+        "location": "Pune",
+        "branch_address": "1 Main Road",
+        "phone_number": "9876543210",
+        "working_hours": "09:00 AM - 05:00 PM",
+        "appointment_duration": 10,
+        **fields,
+    })
+
+
+class QueryBudgetTestCase(TestCase):
+    """Base for tests that pin how many queries a view runs.
+
+    ``assertQueryBudget`` requests a view at each of SIZES rows of data and
+    fails if the query count ever exceeds the budget or changes with the
+    size, which is how a per-row query (N+1) shows up.
+    """
+
+    SIZES = (1, 5, 25)
+
+    def setUp(self):
+        # Per-process caches would otherwise carry state between tests.
+        cache.clear()
+        schedule._schedules.clear()
+        location_index.invalidate()
+        self.staff = Staff.objects.create(email="staff@example.com")
+        self.org = make_org(self.staff)
+        self.user = User.objects.create(username="user@example.com")
+        self.next_minute = 0
+
+    def login_user(self):
+        self.client.force_login(self.user)
+
+    def login_staff(self):
+        session = self.client.session
+        session["staff_id"] = self.staff.id
+        session.save()
+
+    def add_appointments(self, count, day=None, status="Booked", user=None, org=None, spread_days=False):
+        """Create ``count`` appointments at distinct slots (or distinct days with ``spread_days``)."""
+        day = day or date.today()
+        rows = []
+        for _ in range(count):
+            start = self.next_minute
+            self.next_minute += 10
+            rows.append(Appointment(
+                user=user or self.user, org=org or self.org, name="Test", phone="9876543210",
+                date=day + timedelta(days=start // 10) if spread_days else day,
+                time_slot="", start_minute=start % 1440, end_minute=start % 1440 + 10, status=status,
+            ))
+        return Appointment.objects.bulk_create(rows)
+
+    def add_slot_groups(self, count, org=None):
+        org = org or self.org
+        first = org.time_slots.count()
+        TimeSlot.objects.bulk_create(
+            TimeSlot(organization=org, slot_range=f"{format_time(i * 30)} - {format_time(i * 30 + 30)}")
+            for i in range(first, first + count)
+        )
+        bump_schedule_version(org)
+
+    def add_holidays(self, count, org=None):
+        org = org or self.org
+        first = org.holidays.count()
+        Holiday.objects.bulk_create(
+            Holiday(organization=org, date=date(2030, 1, 1) + timedelta(days=i)) for i in range(first, first + count)
+        )
+
+    def assertQueryBudget(self, budget, url, grow=None, method="get", data=None, status=200, warm=True, after_warm=None):
+        """Request ``url`` after ``grow(n)`` has added data up to each of SIZES.
+
+        ``url`` and ``data`` may be callables, for requests that depend on the
+        rows just created. With ``warm`` the request is made once unmeasured
+        first so cached lookups (session, staff context, schedule) are hot;
+        ``after_warm()``, if given, runs between the two requests to drop
+        anything the warm-up cached that the measured request must rebuild.
+        """
+        counts = {}
+        previous = 0
+        for size in self.SIZES:
+            if grow:
+                grow(size - previous)
+            previous = size
+            request = getattr(self.client, method)
+            if warm:
+                request(url() if callable(url) else url, data() if callable(data) else data)
+            if after_warm:
+                after_warm()
+            with CaptureQueriesContext(connection) as queries:
+                response = request(url() if callable(url) else url, data() if callable(data) else data)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            self.assertEqual(response.status_code, status)
+            counts[size] = len(queries)
+
+        self.assertEqual(len(set(counts.values())), 1, f"query count grows with data: {counts}")
+        self.assertLessEqual(max(counts.values()), budget, f"over budget of {budget}: {counts}")
@@ -1,10 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("main/", include("main.urls")),
     path('users/', include('users.urls')), 
     path("staff/", include("staff.urls")),  
     path("bookings/", include("bookings.urls")),
+    path("metrics", metrics, name="metrics"),
 ]
@@ -1,5 +1,7 @@
 from django.contrib import admin
+from qline.paginator import EstimatedCountPaginator
 from .models import Staff, Organization, TimeSlot
+from .schedule import bump_schedule_version
 
 
 class TimeSlotInline(admin.TabularInline): 
@@ -7,13 +9,30 @@ class TimeSlotInline(admin.TabularInline):
     extra = 1   
     fields = ["slot_range"] 
 
+    def get_queryset(self, request):
+        # TimeSlot.__str__ reads the organization for every inline row.
+        return super().get_queryset(request).select_related("organization")
+
 
 @admin.register(Organization)
 class OrganizationAdmin(admin.ModelAdmin):
-    list_display = ("org_name", "service_type", "location", "phone_number")
+    list_display = ("org_name", "service_type", "location", "phone_number", "staff")
+    list_filter = ("service_type", "is_active")
+    list_select_related = ("staff",)
+    search_fields = ("org_name", "location_search", "staff__email")
+    autocomplete_fields = ("staff",)
+    ordering = ("id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [TimeSlotInline]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        bump_schedule_version(form.instance)
+
 
 @admin.register(Staff)
 class StaffAdmin(admin.ModelAdmin):
     list_display = ("email",)
+    search_fields = ("email",)
+    ordering = ("id",)
@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+from .models import Staff, Organization
+
+# Only ids are cached, and the default cache is per process, so another
+# worker's change to which organizations a staff member has shows up here
+# within this many seconds.
+STAFF_CONTEXT_TIMEOUT = 60
+
+
+class StaffContext:
+    """The logged-in staff member's id and the ids of their organizations.
+
+    The organizations themselves are read fresh, once per request, the first
+    time a view asks for them, so views never save a stale copy of a row.
+    """
+
+    def __init__(self, staff_id, org_ids):
+        self.staff_id = staff_id
+        self.org_ids = org_ids
+
+    @cached_property
+    def organizations(self):
+        if not self.org_ids:
+            return []
+        return list(Organization.objects.filter(id__in=self.org_ids, staff_id=self.staff_id).order_by("id"))
+
+    @property
+    def org(self):
+        # The organization staff pages work on: the staff member's first one.
+        return self.organizations[0] if self.organizations else None
+
+    def get_org(self, org_id):
+        if org_id not in self.org_ids:
+            return None
+        return next((org for org in self.organizations if org.id == org_id), None)
+
+
+def _key(staff_id):
+    return f"staff-context:{staff_id}"
+
+
+def get_staff_context(staff_id):
+    """Build a StaffContext from the cached org ids, or with one query on a miss.
+
+    Returns None when the staff member no longer exists.
+    """
+    org_ids = cache.get(_key(staff_id))
+    if org_ids is None:
+        rows = list(Staff.objects.filter(id=staff_id).values_list("organizations__id", flat=True).order_by("organizations__id"))
+        if not rows:
+            return None
+        org_ids = [org_id for org_id in rows if org_id is not None]
+        cache.set(_key(staff_id), org_ids, STAFF_CONTEXT_TIMEOUT)
+    return StaffContext(staff_id, org_ids)
+
+
+def invalidate_staff_context(staff_id):
+    cache.delete(_key(staff_id))
+
+
+class StaffContextMiddleware:
+    """Set ``request.staff_context`` for requests whose session has a staff_id.
+
+    It is None for everyone else.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        staff_id = request.session.get("staff_id")
+        request.staff_context = get_staff_context(staff_id) if staff_id else None
+        return self.get_response(request)
@@ -5,7 +5,7 @@ from .models import Organization
 class OrganizationForm(forms.Form):
     org_name = forms.CharField(max_length=100)
     service_type = forms.ChoiceField(choices=Organization.SERVICE_CHOICES)
-    location = forms.CharField(max_length=150)
+    location = forms.CharField(max_length=100)
     branch_address = forms.CharField(max_length=200)
     phone_number = forms.CharField(max_length=15)
     working_hours = forms.CharField(max_length=50)
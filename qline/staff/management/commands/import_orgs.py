@@ -0,0 +1,195 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from bookings.search import branch_search
+from staff.context import invalidate_staff_context
+from staff.forms import OrganizationForm, TimeSlotForm
+from staff.models import Staff, Organization, TimeSlot, Holiday, normalize_search
+
+# Separator for the time_slots and holidays columns in CSV input.
+CSV_LIST_SEPARATOR = ";"
+
+
+def read_rows(path):
+    """Yield (line number, dict) from a .jsonl or .csv file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix == ".csv":
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                for key in ("time_slots", "holidays"):
+                    row[key] = [v.strip() for v in (row.get(key) or "").split(CSV_LIST_SEPARATOR) if v.strip()]
+                yield line, row
+        else:
+            for line, text in enumerate(f, start=1):
+                if text.strip():
+                    try:
+                        yield line, json.loads(text)
+                    except ValueError as exc:
+                        yield line, {"_error": f"invalid JSON: {exc}"}
+
+
+def _form_errors(form):
+    return "; ".join(f"{field}: {' '.join(messages)}" for field, messages in form.errors.items())
+
+
+@lru_cache(maxsize=4096)
+def clean_slot(value):
+    # Chains reuse the same few slot ranges, so each distinct one is validated once.
+    slot_form = TimeSlotForm({"slot_range": value})
+    if not slot_form.is_valid():
+        raise ValidationError(f"time slot {value!r}: {_form_errors(slot_form)}")
+    return slot_form.cleaned_data["slot_range"]
+
+
+def validate_row(row):
+    """Return (cleaned org data, slot ranges, holiday dates), or raise ValidationError."""
+    if "_error" in row:
+        raise ValidationError(row["_error"])
+    validate_email(row.get("staff_email") or "")
+
+    org_form = OrganizationForm(row)
+    if not org_form.is_valid():
+        raise ValidationError(_form_errors(org_form))
+
+    slots = [clean_slot(value) for value in row.get("time_slots") or []]
+
+    try:
+        holidays = [date.fromisoformat(value) for value in row.get("holidays") or []]
+    except (TypeError, ValueError):
+        raise ValidationError("holidays must be YYYY-MM-DD dates")
+    return org_form.cleaned_data, slots, holidays
+
+
+class Command(BaseCommand):
+    help = (
+        "Import staff, organizations, time slots and holidays from JSONL or CSV. "
+        "Each row is one organization: staff_email, optional staff_password, the "
+        "OrganizationForm fields, time_slots and holidays (lists in JSONL, "
+        f"'{CSV_LIST_SEPARATOR}'-separated in CSV). Staff are matched by email; new "
+        "staff without a password get an unusable one. Passwords are hashed in "
+        "--jobs processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument("--batch-size", type=int, default=500, help="Organizations per transaction.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only.")
+        parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                            help="Processes used to hash new staff passwords.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not path.exists():
+            raise CommandError(f"{path} does not exist.")
+
+        started = time.perf_counter()
+        self.staff_by_email = {}
+        self.totals = {"organizations": 0, "time_slots": 0, "holidays": 0, "staff": 0}
+        self.jobs, self.pool = options["jobs"], None
+        skipped = 0
+        batch = []
+        try:
+            for line, row in read_rows(path):
+                try:
+                    batch.append((row, *validate_row(row)))
+                except ValidationError as exc:
+                    skipped += 1
+                    self.stderr.write(f"{path.name}:{line}: {' '.join(exc.messages)}")
+                    continue
+                if len(batch) >= options["batch_size"]:
+                    self.import_batch(batch, options["dry_run"])
+                    batch = []
+            if batch:
+                self.import_batch(batch, options["dry_run"])
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+
+        if self.totals["organizations"] and not options["dry_run"]:
+            # bulk_create sends no post_save signals. This only reaches running
+            # web workers through a shared cache; otherwise they pick up the new
+            # branches as their cached searches and staff contexts expire.
+            branch_search.invalidate()
+            for staff in self.staff_by_email.values():
+                invalidate_staff_context(staff.id)
+            if not getattr(settings, "CACHE_SHARED", False):
+                self.stdout.write(
+                    "No shared cache: running servers show the new branches within a few minutes, "
+                    "as their cached searches expire."
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Validated' if options['dry_run'] else 'Imported'} {self.totals['organizations']} organizations, "
+            f"{self.totals['time_slots']} time slots, {self.totals['holidays']} holidays and "
+            f"{self.totals['staff']} new staff in {elapsed:.2f}s "
+            f"({self.totals['organizations'] / elapsed if elapsed else 0:.0f} organizations/s); {skipped} rows skipped."
+        ))
+
+    def hash_passwords(self, passwords):
+        """make_password() for each password, spread over --jobs processes.
+
+        Each hash is deliberately slow (PBKDF2), so this dominates imports that
+        carry passwords. None gives an unusable password, which is cheap.
+        """
+        if self.jobs <= 1 or sum(1 for password in passwords if password) < 2 * self.jobs:
+            return [make_password(password) for password in passwords]
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.jobs, initializer=django.setup)
+        return list(self.pool.map(make_password, passwords, chunksize=16))
+
+    def import_batch(self, batch, dry_run):
+        self.totals["organizations"] += len(batch)
+        self.totals["time_slots"] += sum(len(slots) for _, _, slots, _ in batch)
+        self.totals["holidays"] += sum(len(holidays) for _, _, _, holidays in batch)
+        if dry_run:
+            return
+
+        emails = {row["staff_email"] for row, *_ in batch} - self.staff_by_email.keys()
+        self.staff_by_email.update((s.email, s) for s in Staff.objects.filter(email__in=emails))
+        passwords = {}
+        for row, *_ in batch:
+            email = row["staff_email"]
+            if email not in self.staff_by_email and email not in passwords:
+                passwords[email] = row.get("staff_password") or None
+        # Hashed before the transaction so the write lock isn't held meanwhile.
+        new_staff = [
+            Staff(email=email, password=password)
+            for email, password in zip(passwords, self.hash_passwords(list(passwords.values())))
+        ]
+
+        with transaction.atomic():
+            for staff in Staff.objects.bulk_create(new_staff):
+                self.staff_by_email[staff.email] = staff
+            self.totals["staff"] += len(new_staff)
+
+            orgs = Organization.objects.bulk_create([
+                Organization(
+                    staff=self.staff_by_email[row["staff_email"]],
+                    service_type_search=normalize_search(data["service_type"]),
+                    location_search=normalize_search(data["location"]),
+                    **data,
+                )
+                for row, data, _, _ in batch
+            ])
+            TimeSlot.objects.bulk_create(
+                TimeSlot(organization=org, slot_range=slot)
+                for org, (_, _, slots, _) in zip(orgs, batch) for slot in slots
+            )
+            Holiday.objects.bulk_create(
+                Holiday(organization=org, date=day)
+                for org, (_, _, _, holidays) in zip(orgs, batch) for day in holidays
+            )
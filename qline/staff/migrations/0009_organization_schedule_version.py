@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0008_organization_is_active"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organization",
+            name="schedule_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
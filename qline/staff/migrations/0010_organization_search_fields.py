@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+def fill_search_fields(apps, schema_editor):
+    Organization = apps.get_model("staff", "Organization")
+    orgs = list(Organization.objects.only("id", "service_type", "location"))
+    for org in orgs:
+        org.service_type_search = " ".join(org.service_type.split()).lower()
+        org.location_search = " ".join(org.location.split()).lower()
+    Organization.objects.bulk_update(orgs, ["service_type_search", "location_search"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0009_organization_schedule_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organization",
+            name="location_search",
+            field=models.CharField(default="", editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="organization",
+            name="service_type_search",
+            field=models.CharField(default="", editable=False, max_length=50),
+        ),
+        migrations.RunPython(fill_search_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="organization",
+            index=models.Index(fields=["service_type_search", "location_search", "is_active"], name="org_search_idx"),
+        ),
+    ]
@@ -13,6 +13,10 @@ time_range_validator = RegexValidator(
 )
 
 
+def normalize_search(value):
+    return " ".join((value or "").split()).lower()
+
+
 class Staff(models.Model):
     email = models.EmailField(unique=True)
     password = models.CharField(max_length=255)
@@ -48,6 +52,24 @@ class Organization(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True) 
     disabled_since = models.DateField(null=True, blank=True)
+    schedule_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Lowercased copies of service_type/location so searches can use the index.
+    service_type_search = models.CharField(max_length=50, editable=False, default="")
+    location_search = models.CharField(max_length=100, editable=False, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["service_type_search", "location_search", "is_active"], name="org_search_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.service_type_search = normalize_search(self.service_type)
+        self.location_search = normalize_search(self.location)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and ({"service_type", "location"} & set(update_fields)):
+            kwargs["update_fields"] = set(update_fields) | {"service_type_search", "location_search"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.org_name} ({self.location})"
@@ -0,0 +1,114 @@
+import re
+from datetime import datetime
+
+from django.db.models import F
+
+from .context import invalidate_staff_context
+from .models import Organization
+
+
+# org_id -> Schedule, local to this worker process.
+_schedules = {}
+
+
+def parse_time(value):
+    """Parse "09:00 AM" into minutes since midnight."""
+    t = datetime.strptime(value.strip(), "%I:%M %p").time()
+    return t.hour * 60 + t.minute
+
+
+def parse_slot(label):
+    """Parse "09:00 AM – 09:30 AM" (en-dash or hyphen) into (start, end) minutes."""
+    start_str, end_str = re.split(r"[–-]", label)
+    return parse_time(start_str), parse_time(end_str)
+
+
+def format_time(minutes):
+    hour, minute = divmod(minutes % (24 * 60), 60)
+    return f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def slot_label(start, end):
+    return f"{format_time(start)} – {format_time(end)}"
+
+
+class Schedule:
+    """Bookable slots of one organization, compiled from its TimeSlot rows.
+
+    ``groups`` is a list of ``(group_label, is_active, slots)`` where each slot
+    is a ``(start_minute, end_minute, label)`` tuple. ``slots`` flattens the
+    active groups in display order; bit ``i`` of a bitmap refers to ``slots[i]``.
+    """
+
+    def __init__(self, version, duration, groups):
+        self.version = version
+        self.duration = duration
+        self.groups = groups
+        self.slots = [slot for _, is_active, slots in groups if is_active for slot in slots]
+        self._masks = {}
+        for i, (start, _, _) in enumerate(self.slots):
+            self._masks[start] = self._masks.get(start, 0) | (1 << i)
+
+    def is_current(self, org):
+        return self.version == org.schedule_version and self.duration == org.appointment_duration
+
+    def grid(self, booked_starts):
+        grouped_slots = []
+        for group_label, is_active, slots in self.groups:
+            if not is_active:
+                grouped_slots.append({
+                    "group_label": group_label,
+                    "slots": [{"slot_str": group_label, "available": False, "disabled": True}]
+                })
+                continue
+
+            grouped_slots.append({
+                "group_label": group_label,
+                "slots": [
+                    {"slot_str": label, "start": start, "available": start not in booked_starts}
+                    for start, _, label in slots
+                ]
+            })
+        return grouped_slots
+
+    def bitmap(self, booked_starts):
+        """Integer with bit ``i`` set when ``slots[i]`` is booked."""
+        bits = 0
+        for start in booked_starts:
+            bits |= self._masks.get(start, 0)
+        return bits
+
+
+def compile_schedule(org):
+    duration = org.appointment_duration
+    groups = []
+    for slot_group in org.time_slots.all():
+        try:
+            start, end = parse_slot(slot_group.slot_range)
+        except ValueError:
+            continue
+
+        slots = []
+        current = start
+        while duration and current + duration <= end:
+            slots.append((current, current + duration, slot_label(current, current + duration)))
+            current += duration
+
+        groups.append((slot_group.slot_range, slot_group.is_active, tuple(slots)))
+    return Schedule(org.schedule_version, duration, groups)
+
+
+def get_schedule(org):
+    schedule = _schedules.get(org.pk)
+    if schedule is None or not schedule.is_current(org):
+        schedule = compile_schedule(org)
+        _schedules[org.pk] = schedule
+    return schedule
+
+
+def bump_schedule_version(org):
+    # The version lives on the row so every worker sees the change on its next read.
+    Organization.objects.filter(pk=org.pk).update(schedule_version=F("schedule_version") + 1)
+    org.refresh_from_db(fields=["schedule_version"])
+    _schedules.pop(org.pk, None)
+    invalidate_staff_context(org.staff_id)
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .context import invalidate_staff_context
+from .models import Staff, Organization
+
+
+@receiver([post_save, post_delete], sender=Staff)
+def staff_changed(sender, instance, **kwargs):
+    invalidate_staff_context(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def organization_changed(sender, instance, **kwargs):
+    invalidate_staff_context(instance.staff_id)
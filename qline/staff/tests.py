@@ -1,3 +1,239 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from bookings.models import Appointment, ArchivedAppointment, AvailabilityVersion, OrgDailyStats
+from qline.testing import QueryBudgetTestCase, make_org
+from staff.context import get_staff_context
+from staff.models import Staff, Organization, TimeSlot, Holiday
+
+
+class StaffViewQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_staff()
+
+    def add_finished(self, n):
+        self.add_appointments(n, status="Completed", day=date(2020, 1, 1))
+        ArchivedAppointment.objects.bulk_create(
+            ArchivedAppointment(
+                id=10_000_000 + ArchivedAppointment.objects.count() + i, user=self.user, org=self.org,
+                name="Test", phone="9876543210", date=date(2019, 1, 1), time_slot="", status="Missed",
+                updated_at="2019-01-01T00:00:00Z",
+            )
+            for i in range(n)
+        )
+
+    def test_registration_and_login_pages(self):
+        self.assertQueryBudget(1, reverse("service_register"))
+        self.assertQueryBudget(1, reverse("service_register2"))
+        self.assertQueryBudget(1, reverse("staff_login"))
+
+    def test_dashboard(self):
+        def grow(n):
+            self.add_appointments(n)
+            self.add_appointments(n, spread_days=True, day=date.today() + timedelta(days=1))
+            for _ in range(n):
+                make_org(self.staff)
+
+        self.assertQueryBudget(5, reverse("staff_dashboard", args=[self.org.id]), grow)
+
+    def test_edit_service(self):
+        self.assertQueryBudget(3, reverse("staff_edit_service"), self.add_slot_groups)
+
+    def test_appointments(self):
+        self.assertQueryBudget(3, reverse("staff_appointments"), lambda n: self.add_appointments(n, spread_days=True))
+
+    def test_history(self):
+        self.assertQueryBudget(4, reverse("staff_history"), self.add_finished)
+
+    def test_history_export(self):
+        self.assertQueryBudget(4, reverse("staff_history_export"), self.add_finished)
+        self.assertQueryBudget(4, f"{reverse('staff_history_export')}?format=jsonl&status=Missed", self.add_finished)
+
+    def test_slots(self):
+        def grow(n):
+            self.add_slot_groups(n)
+            self.add_holidays(n)
+
+        self.assertQueryBudget(4, reverse("staff_slots"), grow)
+
+    def test_notifications(self):
+        self.assertQueryBudget(3, reverse("staff_notifications"), self.add_appointments)
+
+    def test_serve_and_skip(self):
+        for name in ("staff_serve", "staff_skip"):
+            appointments = iter(self.add_appointments(2 * len(self.SIZES)))
+            self.assertQueryBudget(7, lambda: reverse(name, args=[next(appointments).id]), status=302)
+
+    def test_bulk_action(self):
+        OrgDailyStats.objects.create(org=self.org, date=date.today())
+        AvailabilityVersion.objects.create(org=self.org, date=date.today())
+        self.client.get(reverse("staff_slots"))  # load the cached staff context
+        self.assertQueryBudget(
+            8, reverse("staff_bulk_action"), self.add_appointments, method="post", status=302, warm=False,
+            data=lambda: {
+                "org_id": self.org.id,
+                "action": "skip",
+                "appointment_ids": list(Appointment.objects.filter(status="Booked").values_list("id", flat=True)),
+            },
+        )
+
+
+    def test_view_service(self):
+        self.assertQueryBudget(2, reverse("view_service"), lambda n: [make_org(self.staff) for _ in range(n)])
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_login_post(self):
+        self.staff.set_password("secret123")
+        self.staff.save()
+        self.assertQueryBudget(
+            6, reverse("staff_login"), lambda n: [make_org(self.staff) for _ in range(n)], method="post",
+            data={"email": self.staff.email, "password": "secret123"}, status=302,
+        )
+
+    def test_logout(self):
+        get_staff_context(self.staff.id)
+        self.assertQueryBudget(4, reverse("staff_logout"), lambda n: self.login_staff(), status=302, warm=False)
+
+    def test_service_register_post(self):
+        self.assertQueryBudget(
+            4, reverse("service_register"), method="post", status=302, data={
+                "org_name": "City Clinic", "service_type": "clinic", "location": "Pune",
+                "branch_address": "1 Main Road", "phone_number": "9876543210",
+                "working_hours": "09:00 AM - 05:00 PM", "appointment_duration": 10,
+                "time_slots[]": ["09:00 AM - 12:00 PM", "01:00 PM - 05:00 PM"],
+            },
+        )
+
+    def test_slots_post(self):
+        def grow(n):
+            self.add_slot_groups(n)
+            self.add_holidays(n)
+
+        requests = 2 * len(self.SIZES)
+        slots = iter(TimeSlot.objects.bulk_create(
+            TimeSlot(organization=self.org, slot_range="06:00 PM - 07:00 PM") for _ in range(requests)
+        ))
+        holidays = iter(Holiday.objects.bulk_create(
+            Holiday(organization=self.org, date=date(2031, 1, 1) + timedelta(days=i)) for i in range(requests)
+        ))
+        new_holidays = (f"2032-01-{day:02}" for day in range(1, requests + 1))
+        slot_id = self.org.time_slots.first().id
+        budgets = {
+            "add": (6, lambda: {"slot_range": "07:00 PM - 08:00 PM"}),
+            "edit": (7, lambda: {"slot_id": slot_id, "slot_range": "07:00 PM - 08:00 PM"}),
+            "delete": (8, lambda: {"slot_id": next(slots).id}),
+            # A day's first holiday change also creates its AvailabilityVersion row.
+            "add_holiday": (11, lambda: {"holiday_date": next(new_holidays)}),
+            "delete_holiday": (12, lambda: {"holiday_id": next(holidays).id}),
+            "toggle_service": (4, lambda: {}),
+        }
+        for action, (budget, data) in budgets.items():
+            with self.subTest(action):
+                self.assertQueryBudget(
+                    budget, reverse("staff_slots"), grow, method="post", status=302,
+                    data=lambda: {"action": action, **data()},
+                )
+
+class StaffContextTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_staff()
+
+    def test_writes_do_not_revert_changes_made_elsewhere(self):
+        self.client.get(reverse("staff_slots"))  # cache the staff context
+        # Another worker changes the row; this process's cache is not told.
+        Organization.objects.filter(pk=self.org.pk).update(schedule_version=41, appointment_duration=15)
+
+        self.client.post(reverse("staff_slots"), {"action": "toggle_service"})
+        self.client.post(reverse("staff_edit_service"), {
+            "address": "2 Side Street", "contact": "9876543210", "location": "Town", "description": "clinic",
+        })
+
+        org = Organization.objects.get(pk=self.org.pk)
+        self.assertFalse(org.is_active)
+        self.assertEqual(org.branch_address, "2 Side Street")
+        self.assertEqual(org.appointment_duration, 15)
+        self.assertGreater(org.schedule_version, 41)
+
+
+class HistoryExportTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_staff()
+        self.add_appointments(2, status="Completed", day=date(2020, 1, 1))
+        ArchivedAppointment.objects.create(
+            id=10_000_000, user=self.user, org=self.org, name="Old", phone="9876543210", date=date(2019, 1, 1),
+            time_slot="", status="Missed", updated_at="2019-01-01T00:00:00Z",
+        )
+        hot = Appointment.objects.order_by("id")
+        hot.filter(id=hot[0].id).update(updated_at="2018-01-01T00:00:00Z")
+        hot.filter(id=hot[1].id).update(updated_at="2021-01-01T00:00:00Z")
+        self.expected = [hot[0].id, 10_000_000, hot[1].id]
+
+    def exported_ids(self, content):
+        return [int(line.split(",")[0]) for line in content.decode().splitlines()[1:]]
+
+    def test_rows_merged_in_updated_order(self):
+        response = self.client.get(reverse("staff_history_export"))
+        self.assertEqual(self.exported_ids(b"".join(response.streaming_content)), self.expected)
+
+    async def test_streamed_chunk_by_chunk_under_asgi(self):
+        self.async_client.cookies = self.client.cookies
+        response = await self.async_client.get(reverse("staff_history_export"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(chunks[0], b"id,name,phone,date,time_slot,status,updated_at\r\n")
+        self.assertEqual(self.exported_ids(b"".join(chunks)), self.expected)
+
+
+class HolidayAvailabilityTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_staff()
+
+    def test_holiday_changes_bump_the_saved_date(self):
+        self.client.post(reverse("staff_slots"), {"action": "add_holiday", "holiday_date": "2030-1-5"})
+        version = AvailabilityVersion.objects.get(org=self.org, date=date(2030, 1, 5))
+        self.assertEqual(version.version, 1)
+
+        holiday = self.org.holidays.get()
+        self.client.post(reverse("staff_slots"), {"action": "delete_holiday", "holiday_id": holiday.id})
+        version.refresh_from_db()
+        self.assertEqual(version.version, 2)
+
+
+class ImportOrgsTests(TestCase):
+    ROW = {
+        "staff_email": "owner@example.com", "staff_password": "secret123", "org_name": "City Clinic",
+        "service_type": "clinic", "location": "Pune", "branch_address": "1 Main Road",
+        "phone_number": "9876543210", "working_hours": "09:00 AM - 05:00 PM", "appointment_duration": 10,
+        "time_slots": ["09:00 AM - 12:00 PM"],
+    }
+
+    def import_rows(self, *rows):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "orgs.jsonl"
+            path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+            stderr = StringIO()
+            call_command("import_orgs", str(path), jobs=1, stdout=StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def test_imports_staff_and_organizations(self):
+        self.import_rows(self.ROW, {**self.ROW, "org_name": "Second"})
+        staff = Staff.objects.get()
+        self.assertTrue(staff.check_password("secret123"))
+        self.assertEqual(staff.organizations.count(), 2)
+
+    def test_location_longer_than_the_column_is_rejected(self):
+        errors = self.import_rows({**self.ROW, "location": "x" * 101})
+        self.assertIn("location", errors)
+        self.assertFalse(Organization.objects.exists())
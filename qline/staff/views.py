@@ -1,12 +1,27 @@
+import csv
+import heapq
+import json
 import re
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseBadRequest, HttpResponseNotAllowed, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib import messages
 from .models import Staff, Organization, TimeSlot, Holiday
 from .forms import OrganizationForm, TimeSlotForm
+from .schedule import bump_schedule_version
+from .context import get_staff_context
 from django.contrib.auth import logout
 from datetime import datetime, date
-from bookings.models import Appointment
+from bookings.models import Appointment, ArchivedAppointment
+from bookings.availability import bump_availability
+from bookings.bulk import bulk_transition, transition_appointment
+from bookings.counters import dashboard_counts, record_status_change
+from bookings.pagination import KeysetPage
+from bookings.events import publish_appointment_event
 from django.utils import timezone
+from django.db import transaction
 
 
 def service_register(request):
@@ -91,6 +106,7 @@ def service_register2(request):
 
         for slot in slot_data:
             TimeSlot.objects.create(organization=org, slot_range=slot["slot_range"])
+        bump_schedule_version(org)
 
         request.session.pop("org_data", None)
         request.session.pop("slot_data", None)
@@ -116,7 +132,7 @@ def staff_login(request):
             request.session["staff_id"] = staff.id
             request.session["staff_email"] = staff.email
 
-            org = Organization.objects.filter(staff=staff).first()
+            org = get_staff_context(staff.id).org
             if org:
                 return redirect("staff_dashboard", org_id=org.id)
             return redirect("view_service")
@@ -128,71 +144,107 @@ def staff_login(request):
 
 
 def staff_dashboard(request, org_id):
-    staff_id = request.session.get("staff_id")
-    if not staff_id:
+    staff_context = request.staff_context
+    if staff_context is None:
         return redirect("staff_login")
 
-    staff = get_object_or_404(Staff, id=staff_id)
-    org = get_object_or_404(Organization, id=org_id, staff=staff)
+    org = staff_context.get_org(org_id)
+    if org is None:
+        raise Http404
     today = date.today()
 
-    todays_appointments = Appointment.objects.filter(
+    todays_appointments = list(Appointment.objects.filter(
         org=org, date=today
-    ).order_by("time_slot")
-
-    upcoming_count = Appointment.objects.filter(
-        org=org, date__gt=today, status="Booked"
-    ).count()
-
-    completed_count = Appointment.objects.filter(
-        org=org, status="Completed"
-    ).count()
-
-    missed_count = Appointment.objects.filter(
-        org=org, status="Missed"
-    ).count()
+    ).order_by("start_minute"))
 
     return render(request, "staff/staff_dashboard.html", {
         "staff_org": org,
-        "organizations": Organization.objects.filter(staff=staff),
-        "today_count": todays_appointments.count(),
-        "upcoming_count": upcoming_count,
-        "completed_count": completed_count,
-        "missed_count": missed_count,
+        "organizations": staff_context.organizations,
+        **dashboard_counts(org, today),
         "todays_appointments": todays_appointments,
     })
 
 def staff_serve(request, appointment_id):
-    appointment = get_object_or_404(Appointment, id=appointment_id)
-    appointment.status = "Completed"
-    appointment.save()
-    messages.success(request, "Appointment marked as served ")
-    return redirect("staff_dashboard", org_id=appointment.org.id)
+    staff_context = request.staff_context
+    if staff_context is None:
+        return redirect("staff_login")
+
+    appointment = get_object_or_404(
+        Appointment, id=appointment_id, org_id__in=staff_context.org_ids
+    )
+    if transition_appointment(appointment, "Completed", "served"):
+        messages.success(request, "Appointment marked as served ")
+    else:
+        messages.info(request, "This appointment was already updated.")
+    return redirect("staff_dashboard", org_id=appointment.org_id)
 
 def staff_skip(request, appointment_id):
-    appointment = get_object_or_404(Appointment, id=appointment_id)
-    appointment.status = "Missed"
-    appointment.save()
-    messages.warning(request, "Appointment marked as skipped ")
-    return redirect("staff_dashboard", org_id=appointment.org.id)
+    staff_context = request.staff_context
+    if staff_context is None:
+        return redirect("staff_login")
+
+    appointment = get_object_or_404(
+        Appointment, id=appointment_id, org_id__in=staff_context.org_ids
+    )
+    if transition_appointment(appointment, "Missed", "skipped"):
+        messages.warning(request, "Appointment marked as skipped ")
+    else:
+        messages.info(request, "This appointment was already updated.")
+    return redirect("staff_dashboard", org_id=appointment.org_id)
+
+
+# action -> (new status, event type)
+BULK_ACTIONS = {
+    "serve": ("Completed", "served"),
+    "skip": ("Missed", "skipped"),
+    "cancel": ("Cancelled", "cancelled"),
+}
 
 
+def staff_bulk_action(request):
+    staff_context = request.staff_context
+    if staff_context is None:
+        return redirect("staff_login")
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        org_id = int(request.POST.get("org_id", ""))
+    except ValueError:
+        org_id = None
+    action = request.POST.get("action")
+    if org_id not in staff_context.org_ids or action not in BULK_ACTIONS:
+        return HttpResponseBadRequest()
+
+    appointments = Appointment.objects.filter(org_id=org_id)
+    if request.POST.get("scope") == "past_today":
+        # Booked slots today that have already ended.
+        now = datetime.now()
+        appointments = appointments.filter(date=now.date(), end_minute__lte=now.hour * 60 + now.minute)
+    else:
+        ids = [value for value in request.POST.getlist("appointment_ids") if value.isdigit()]
+        appointments = appointments.filter(id__in=ids)
+
+    new_status, event_type = BULK_ACTIONS[action]
+    changed = bulk_transition(appointments, new_status, event_type)
+    messages.success(request, f"{changed} appointment{'' if changed == 1 else 's'} marked as {new_status.lower()}.")
+    return redirect("staff_dashboard", org_id=org_id)
+
 def staff_view_service(request):
-    staff_id = request.session.get("staff_id")
-    if not staff_id:
+    staff_context = request.staff_context
+    if staff_context is None:
         return redirect("staff_login")
     return render(request, "staff/view_service.html", {
-        "services": Organization.objects.filter(staff_id=staff_id)
+        "services": staff_context.organizations
     })
 
 
 def staff_edit_service(request):
-    staff_id = request.session.get("staff_id")
-    if not staff_id:
+    staff_context = request.staff_context
+    if staff_context is None:
         return redirect("staff_login")
 
-    staff = get_object_or_404(Staff, id=staff_id)
-    org = Organization.objects.filter(staff=staff).first()
+    org = staff_context.org
     if not org:
         return render(request, "staff/edit_service.html", {"error": "No organization found."})
 
@@ -201,12 +253,13 @@ def staff_edit_service(request):
         org.phone_number = request.POST.get("contact")
         org.location = request.POST.get("location")
         org.service_type = request.POST.get("description")
-        org.save()
+        org.save(update_fields=["branch_address", "phone_number", "location", "service_type"])
 
         org.time_slots.all().delete()
         for slot in request.POST.getlist("time_slots[]"):
             if slot.strip():
                 TimeSlot.objects.create(organization=org, slot_range=slot.strip())
+        bump_schedule_version(org)
 
         messages.success(request, "Organization updated successfully!")
         return redirect("staff_edit_service")
@@ -225,11 +278,11 @@ def staff_edit_service(request):
 
 
 def staff_appointments(request):
-    staff_id = request.session.get("staff_id")
-    if not staff_id:
+    staff_context = request.staff_context
+    if staff_context is None:
         return redirect("staff_login")
 
-    org = Organization.objects.filter(staff_id=staff_id).first()
+    org = staff_context.org
     if not org:
         return render(request, 'staff/appointments.html', {
             "appointments": [],
@@ -240,17 +293,24 @@ def staff_appointments(request):
     filter_type = request.GET.get("filter")
     search_query = request.GET.get("search", "")
 
-    appointments = Appointment.objects.filter(org=org).order_by("date", "time_slot")
+    appointments = Appointment.objects.filter(org=org).order_by("date", "start_minute")
 
     if request.method == "POST" and request.POST.get("action") == "delete":
         appointment_id = request.POST.get("appointment_id")
-        Appointment.objects.filter(id=appointment_id, org=org).delete()
+        appointment = Appointment.objects.filter(id=appointment_id, org=org).first()
+        if appointment:
+            with transaction.atomic():
+                # Only counted if a concurrent serve/skip/cancel didn't change it first.
+                deleted, _ = Appointment.objects.filter(pk=appointment.pk, status=appointment.status).delete()
+                if deleted:
+                    record_status_change(org.id, appointment.date, appointment.status, None)
+                    publish_appointment_event("deleted", appointment)
         messages.success(request, "Appointment deleted successfully.")
         return redirect("staff_appointments")
 
     appointments = Appointment.objects.filter(
         org=org, status="Booked"
-    ).order_by("date", "time_slot")
+    ).order_by("date", "start_minute")
 
 
     if filter_type == "today":
@@ -263,42 +323,135 @@ def staff_appointments(request):
         appointments = appointments.filter(name__icontains=search_query)
 
     return render(request, 'staff/appointments.html', {
-        "appointments": appointments,
+        "appointments": KeysetPage(appointments, ["date", "start_minute", "id"], request.GET.get("cursor")),
         "staff_org": org,
     })
 
 
 
 def staff_history(request):
-    staff_id = request.session.get("staff_id")
-    if not staff_id:
+    staff_context = request.staff_context
+    if staff_context is None:
         return redirect("staff_login")
 
-    org = Organization.objects.filter(staff_id=staff_id).first()
+    org = staff_context.org
     if not org:
         return render(request, "staff/staff_history.html", {"appointments": []})
     search_query = request.GET.get("q")
-    appointments = Appointment.objects.filter(org=org).exclude(status="Booked")
+    appointments = [
+        Appointment.objects.filter(org=org).exclude(status="Booked"),
+        ArchivedAppointment.objects.filter(org=org),
+    ]
     if search_query:
-        appointments = appointments.filter(name__icontains=search_query)
+        appointments = [queryset.filter(name__icontains=search_query) for queryset in appointments]
 
 
     return render(request, "staff/staff_history.html", {
-        "appointments": appointments.order_by("-updated_at"),
+        "appointments": KeysetPage(appointments, ["-updated_at", "-id"], request.GET.get("cursor")),
         "staff_org": org
     })
 
 
+
+EXPORT_FIELDS = ["id", "name", "phone", "date", "time_slot", "status", "updated_at"]
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line straight back.
+    def write(self, value):
+        return value
+
+
+def _export_chunks(querysets, format_row, header=None):
+    """Formatted rows, EXPORT_CHUNK_SIZE at a time, in (updated_at, id) order across all querysets."""
+    if header:
+        yield header
+    # Each queryset walks its (org, updated_at) index, so merging needs no sort.
+    streams = [
+        queryset.order_by("updated_at", "id").values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for queryset in querysets
+    ]
+    chunk, previous_id = [], None
+    for row in heapq.merge(*streams, key=lambda row: (row[-1], row[0])):
+        if row[0] == previous_id:
+            # Caught mid-archive: the same appointment in both tables.
+            continue
+        previous_id = row[0]
+        chunk.append(format_row(row))
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+async def _aiter_chunks(chunks):
+    # Under ASGI Django would drain a sync iterator into memory before sending,
+    # so pull each chunk (and its queries) through sync_to_async instead.
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+def staff_history_export(request):
+    staff_context = request.staff_context
+    if staff_context is None:
+        return redirect("staff_login")
+    org = staff_context.org
+    if not org:
+        raise Http404
+
+    export_format = request.GET.get("format", "csv")
+    if export_format not in ("csv", "jsonl"):
+        return HttpResponseBadRequest("format must be csv or jsonl")
+
+    appointments = [
+        Appointment.objects.filter(org=org).exclude(status="Booked"),
+        ArchivedAppointment.objects.filter(org=org),
+    ]
+    filters = {}
+    try:
+        if request.GET.get("date_from"):
+            filters["date__gte"] = date.fromisoformat(request.GET["date_from"])
+        if request.GET.get("date_to"):
+            filters["date__lte"] = date.fromisoformat(request.GET["date_to"])
+    except ValueError:
+        return HttpResponseBadRequest("dates must be YYYY-MM-DD")
+    statuses = [status for status in request.GET.getlist("status") if status]
+    if statuses:
+        filters["status__in"] = statuses
+    appointments = [queryset.filter(**filters) for queryset in appointments]
+
+    if export_format == "csv":
+        writer = csv.writer(_Echo())
+        chunks = _export_chunks(appointments, writer.writerow, header=writer.writerow(EXPORT_FIELDS))
+        content_type = "text/csv"
+    else:
+        chunks = _export_chunks(
+            appointments, lambda row: json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + "\n"
+        )
+        content_type = "application/x-ndjson"
+
+    if isinstance(request, ASGIRequest):
+        chunks = _aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="history-{org.id}-{date.today()}.{export_format}"'
+    response["X-Accel-Buffering"] = "no"
+    return response
+
 def staff_slots(request):
-    staff_id = request.session.get("staff_id")
-    if not staff_id:
+    staff_context = request.staff_context
+    if staff_context is None:
         return redirect("staff_login")
 
-    staff = get_object_or_404(Staff, id=staff_id)
-    org = Organization.objects.filter(staff=staff).first()
+    org = staff_context.org
     if not org:
         messages.error(request, "No organization found for this staff.")
-        return redirect("staff_dashboard", org_id=staff_id)
+        return redirect("staff_dashboard", org_id=staff_context.staff_id)
 
     if request.method == "POST":
         action = request.POST.get("action")
@@ -307,6 +460,7 @@ def staff_slots(request):
             slot_range = request.POST.get("slot_range")
             if slot_range:
                 TimeSlot.objects.create(organization=org, slot_range=slot_range)
+                bump_schedule_version(org)
                 messages.success(request, "Time slot added successfully.")
 
         elif action == "edit":
@@ -315,23 +469,33 @@ def staff_slots(request):
             slot = get_object_or_404(TimeSlot, id=slot_id, organization=org)
             slot.slot_range = slot_range
             slot.save()
+            bump_schedule_version(org)
             messages.success(request, "Time slot updated successfully.")
 
         elif action == "delete":
             slot_id = request.POST.get("slot_id")
             slot = get_object_or_404(TimeSlot, id=slot_id, organization=org)
             slot.delete()
+            bump_schedule_version(org)
             messages.success(request, "Time slot deleted successfully.")
 
 
         elif action == "add_holiday":
             holiday_date = request.POST.get("holiday_date")
-            Holiday.objects.create(organization=org, date=holiday_date)
+            with transaction.atomic():
+                holiday = Holiday.objects.create(
+                    organization=org, date=Holiday._meta.get_field("date").to_python(holiday_date)
+                )
+                bump_availability(org.id, holiday.date)
             messages.success(request, f"Holiday on {holiday_date} added.")
 
         elif action == "delete_holiday":
             holiday_id = request.POST.get("holiday_id")
-            Holiday.objects.filter(id=holiday_id, organization=org).delete()
+            holiday = Holiday.objects.filter(id=holiday_id, organization=org).first()
+            if holiday:
+                with transaction.atomic():
+                    holiday.delete()
+                    bump_availability(org.id, holiday.date)
             messages.success(request, "Holiday removed.")
 
         elif action == "toggle_service":
@@ -340,7 +504,7 @@ def staff_slots(request):
                 org.disabled_since = date.today()
             else:
                 org.disabled_since = None
-            org.save()
+            org.save(update_fields=["is_active", "disabled_since"])
             messages.success(request, f"Service {'enabled' if org.is_active else 'disabled'}.")
 
         return redirect("staff_slots")
@@ -355,18 +519,17 @@ def staff_slots(request):
 
 
 def staff_notifications(request):
-    staff_id = request.session.get("staff_id")
-    if not staff_id:
+    staff_context = request.staff_context
+    if staff_context is None:
         return redirect("staff_login")
 
-    staff = get_object_or_404(Staff, id=staff_id)
-    org = Organization.objects.filter(staff=staff).first()
+    org = staff_context.org
 
     if not org:
         messages.error(request, "No organization found for this staff.")
-        return redirect("staff_dashboard", org_id=staff_id)
+        return redirect("staff_dashboard", org_id=staff_context.staff_id)
 
-    recent_appointments = Appointment.objects.filter(org=org).order_by("-updated_at")[:15]
+    recent_appointments = Appointment.objects.filter(org=org).select_related("org").order_by("-updated_at")[:15]
 
     return render(request, "staff/notifications.html", {
         "staff_org": org,
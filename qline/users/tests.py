@@ -1,3 +1,131 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from bookings.availability import bump_availability
+from bookings.models import Appointment
+from qline.testing import QueryBudgetTestCase
+from staff.schedule import slot_label
+
+
+class UserViewQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_user()
+
+    def test_register_and_login_pages(self):
+        self.client.logout()
+        self.assertQueryBudget(0, reverse("user_register"))
+        self.assertQueryBudget(0, reverse("user_login"))
+
+    def test_dashboard(self):
+        def grow(n):
+            self.add_appointments(n, spread_days=True)
+            self.add_appointments(n, status="Completed", day=date(2020, 1, 1))
+
+        self.assertQueryBudget(2, reverse("dashboard"), grow)
+
+    def test_branch_details(self):
+        day = date.today() + timedelta(days=1)
+
+        def grow(n):
+            self.add_slot_groups(n)
+            self.add_appointments(n, day=day)
+
+        # A new availability version after the warm-up, so the slot grid is
+        # built, not served from the fragment cache.
+        self.assertQueryBudget(
+            6, f"{reverse('branch_details', args=[self.org.id])}?date={day}", grow,
+            after_warm=lambda: bump_availability(self.org.id, day),
+        )
+
+    def test_branch_details_booking(self):
+        day = date.today() + timedelta(days=1)
+        other = User.objects.create(username="other@example.com")
+        free_starts = iter(())
+
+        def grow(n):
+            nonlocal free_starts
+            # Keep the user under the per-branch booking limit.
+            Appointment.objects.filter(user=self.user).update(status="Cancelled")
+            self.add_slot_groups(n)
+            self.add_appointments(n, day=day, user=other)
+            # Scheduled slots after the ones just booked.
+            free_starts = iter(range(self.next_minute, self.org.time_slots.count() * 30, 10))
+
+        def data():
+            start = next(free_starts)
+            return {"user_name": "Test", "phone": "9876543210", "date": day.isoformat(),
+                    "selected_slot": slot_label(start, start + 10)}
+
+        self.assertQueryBudget(
+            14, f"{reverse('branch_details', args=[self.org.id])}?date={day}", grow, method="post", data=data,
+        )
+
+    def test_branch_details_rejects_unscheduled_slots(self):
+        day = date.today() + timedelta(days=1)
+        self.add_slot_groups(1)
+        url = f"{reverse('branch_details', args=[self.org.id])}?date={day}"
+        # Overlapping two scheduled slots, wrapping past midnight, off the grid.
+        for label in ["12:05 AM - 12:15 AM", "11:00 PM - 01:00 AM", "01:00 AM - 01:10 AM"]:
+            with self.subTest(label=label):
+                response = self.client.post(url, {"user_name": "Test", "phone": "9876543210",
+                                                  "date": day.isoformat(), "selected_slot": label})
+                self.assertRedirects(response, reverse("branch_details", args=[self.org.id]))
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_branch_details_slot_grid_cache(self):
+        day = date.today() + timedelta(days=1)
+        url = f"{reverse('branch_details', args=[self.org.id])}?date={day}"
+        self.add_slot_groups(1)
+        self.client.get(url)
+        with self.assertNumQueries(5):
+            self.assertNotContains(self.client.get(url), 'class="slot booked"')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {"user_name": "Test", "phone": "9876543210", "date": day.isoformat(),
+                                   "selected_slot": slot_label(0, 10)})
+        self.assertContains(self.client.get(url), 'class="slot booked"', count=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("cancel_appointment", args=[Appointment.objects.get(user=self.user).id]))
+        self.assertNotContains(self.client.get(url), 'class="slot booked"')
+
+    def test_branch_details_on_holiday(self):
+        self.add_holidays(1)
+        self.assertQueryBudget(4, f"{reverse('branch_details', args=[self.org.id])}?date=2030-01-01", self.add_slot_groups)
+
+    def test_branch_availability(self):
+        def grow(n):
+            self.add_slot_groups(n)
+            self.add_appointments(n, spread_days=True)
+            self.add_holidays(n)
+
+        self.assertQueryBudget(5, reverse("branch_availability", args=[self.org.id]), grow)
+
+    def test_branch_availability_invalid_dates(self):
+        url = reverse("branch_availability", args=[self.org.id])
+        for params in [{"from": "2030-13-01"}, {"from": "9999-12-31"}, {"from": "2030-01-02", "to": "2030-01-01"}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+    def test_book_slot(self):
+        self.assertQueryBudget(3, reverse("book_slot", args=[self.org.id]), self.add_slot_groups)
+
+    def test_book_slot_post(self):
+        day = date.today() + timedelta(days=1)
+
+        def grow(n):
+            self.add_slot_groups(n)
+            self.add_appointments(n, day=day)
+
+        self.assertQueryBudget(
+            8, reverse("book_slot", args=[self.org.id]), grow, method="post",
+            data={"user_name": "Test", "phone": "9876543210", "date": day.isoformat()},
+        )
+
+    def test_logout(self):
+        self.assertQueryBudget(
+            4, reverse("user_logout"), lambda n: (self.add_appointments(n), self.login_user()), status=302, warm=False,
+        )
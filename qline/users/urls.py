@@ -7,5 +7,6 @@ urlpatterns = [
     path('logout/', views.user_logout, name='user_logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('branch/<int:branch_id>/', views.branch_details, name='branch_details'),
+    path('branch/<int:branch_id>/availability/', views.branch_availability, name='branch_availability'),
     path('book/<int:org_id>/', views.book_slot, name='book_slot'),
 ]
\ No newline at end of file
@@ -1,16 +1,63 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from staff.models import Organization, TimeSlot, Holiday
+from staff.schedule import get_schedule, parse_slot, slot_label
 from datetime import datetime, timedelta
-from bookings.models import Appointment
+from django.db import OperationalError, router
+from bookings.availability import availability_version
+from bookings.models import Appointment, ArchivedAppointment
+from bookings.pagination import KeysetPage
+from bookings.reservations import reserve_appointment, SlotTaken, BookingLimitReached, MAX_ACTIVE_PER_BRANCH
 
 import re
 
+
+def get_booked_slots(org, date_obj, using=None):
+    # One query per (org, date); cancelled bookings free their slot again.
+    return set(
+        Appointment.objects.using(using).filter(org=org, date=date_obj)
+        .exclude(status="Cancelled")
+        .values_list("start_minute", flat=True)
+    )
+
+
+SLOT_GRID_TIMEOUT = 60 * 10
+
+
+def slot_grid_html(org, date_obj):
+    """Rendered slot grid for one org and date, cached until its availability changes.
+
+    The key covers the schedule (slot groups, duration) and the per-day
+    availability version bumped by bookings, cancellations and holidays, so
+    everyone viewing the same branch and date shares one render.
+    """
+    # Version and bookings come from the same database, so a replica that
+    # lags the version can't pair it with older bookings.
+    using = router.db_for_read(Appointment)
+    key = (
+        f"slot-grid:{org.id}:{date_obj.isoformat()}:{org.schedule_version}:{org.appointment_duration}:"
+        f"{availability_version(org.id, date_obj, using)}"
+    )
+    html = cache.get(key)
+    if html is None:
+        grouped_slots = get_schedule(org).grid(get_booked_slots(org, date_obj, using))
+        html = render_to_string("users/slot_grid.html", {"grouped_slots": grouped_slots}) if grouped_slots else ""
+        cache.set(key, html, SLOT_GRID_TIMEOUT)
+    return mark_safe(html)
+
+
+AVAILABILITY_MAX_DAYS = 60
+
+
 def user_register(request):
     context = {}
     if request.method == "POST":
@@ -79,8 +126,15 @@ def dashboard(request):
     user = request.user
     display_name = user.first_name or user.username.split("@")[0].title()
 
-    active_appointments = Appointment.objects.filter(user=user, status="Booked").order_by("date", "time_slot")
-    past_appointments = Appointment.objects.filter(user=user).exclude(status="Booked").order_by("-date", "-time_slot")
+    active_appointments = Appointment.objects.filter(user=user, status="Booked").order_by("date", "start_minute")
+    past_appointments = KeysetPage(
+        [
+            Appointment.objects.filter(user=user).exclude(status="Booked").select_related("org"),
+            ArchivedAppointment.objects.filter(user=user).select_related("org"),
+        ],
+        ["-date", "-start_minute", "-id"],
+        request.GET.get("cursor"),
+    )
 
     return render(request, "users/dashboard.html", {
         "username_display": display_name,
@@ -92,14 +146,13 @@ def dashboard(request):
 @login_required
 def branch_details(request, branch_id):
     org = get_object_or_404(Organization, id=branch_id, is_active=True)
-    slots = org.time_slots.all()
     today = datetime.now().date()
 
     pre_name = (request.GET.get("user_name") or request.POST.get("user_name") or "").strip()
     pre_phone = (request.GET.get("phone") or request.POST.get("phone") or "").strip()
     date_for_generation = request.GET.get("date") or request.POST.get("date") or ""
 
-    grouped_slots = []
+    slot_grid = ""
     holiday = False
     if date_for_generation:
         try:
@@ -112,36 +165,7 @@ def branch_details(request, branch_id):
             if Holiday.objects.filter(organization=org, date=date_obj).exists():
                 holiday = True
             else:
-                appointment_duration = org.appointment_duration
-                for slot_group in slots:
-                    slot_list = []
-
-                    try:
-                        start_str, end_str = [t.strip() for t in slot_group.slot_range.split("-")]
-                        start_time = datetime.strptime(start_str, "%I:%M %p").time()
-                        end_time = datetime.strptime(end_str, "%I:%M %p").time()
-                    except Exception:
-                        continue
-
-                    start_dt = datetime.combine(date_obj, start_time)
-                    end_dt = datetime.combine(date_obj, end_time)
-
-                    current = start_dt
-                    while current + timedelta(minutes=appointment_duration) <= end_dt:
-                        next_dt = current + timedelta(minutes=appointment_duration)
-                        slot_str = f"{current.strftime('%I:%M %p')} – {next_dt.strftime('%I:%M %p')}"
-                        booked = Appointment.objects.filter(org=org, date=date_obj, time_slot=slot_str).exists()
-
-                        slot_list.append({
-                            "slot_str": slot_str,
-                            "available": not booked
-                        })
-                        current = next_dt
-
-                    grouped_slots.append({
-                        "group_label": slot_group.slot_range,
-                        "slots": slot_list
-                    })
+                slot_grid = slot_grid_html(org, date_obj)
 
     # Handle POST booking
     if request.method == "POST":
@@ -155,7 +179,7 @@ def branch_details(request, branch_id):
             return render(request, "users/branch_details.html", {
                 "org": org,
                 "today": today,
-                "grouped_slots": grouped_slots,
+                "slot_grid": slot_grid,
                 "selected_date": date_for_generation,
                 "pre_name": user_name,
                 "pre_phone": phone,
@@ -166,7 +190,7 @@ def branch_details(request, branch_id):
             return render(request, "users/branch_details.html", {
                 "org": org,
                 "today": today,
-                "grouped_slots": grouped_slots,
+                "slot_grid": slot_grid,
                 "selected_date": date_for_generation,
                 "pre_name": user_name,
                 "pre_phone": phone,
@@ -174,37 +198,47 @@ def branch_details(request, branch_id):
 
         date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
 
+        try:
+            start_minute, end_minute = parse_slot(selected_slot)
+        except ValueError:
+            start_minute = end_minute = None
+        # Only the schedule's own slots: any other parseable label could
+        # overlap them without tripping the unique (org, date, start) constraint.
+        if not any(slot[:2] == (start_minute, end_minute) for slot in get_schedule(org).slots):
+            messages.error(request, "Please select a valid slot.")
+            return redirect("branch_details", branch_id=org.id)
 
         if Holiday.objects.filter(organization=org, date=date_obj).exists():
             messages.error(request, "This date is marked as holiday. No bookings allowed.")
             return redirect("branch_details", branch_id=org.id)
 
-        if Appointment.objects.filter(org=org, date=date_obj, time_slot=selected_slot).exists():
+        try:
+            appointment = reserve_appointment(
+                request.user,
+                org,
+                date_obj,
+                start_minute,
+                end_minute,
+                name=user_name,
+                time_slot=slot_label(start_minute, end_minute),
+                phone=phone,
+            )
+        except SlotTaken:
             messages.error(request, "Slot already booked.")
             return render(request, "users/branch_details.html", {
                 "org": org,
                 "today": today,
-                "grouped_slots": grouped_slots,
+                "slot_grid": slot_grid,
                 "selected_date": date_for_generation,
                 "pre_name": user_name,
                 "pre_phone": phone,
             })
-
-
-        if Appointment.objects.filter(user=request.user, org=org, status="Booked").count() >= 2:
-            messages.error(request, "You can only book up to 2 active appointments at this branch.")
+        except BookingLimitReached:
+            messages.error(request, f"You can only book up to {MAX_ACTIVE_PER_BRANCH} active appointments at this branch.")
+            return redirect("branch_details", branch_id=org.id)
+        except OperationalError:
+            messages.error(request, "Booking is busy right now, please try again.")
             return redirect("branch_details", branch_id=org.id)
-
-        #  Create appointment
-        appointment = Appointment.objects.create(
-            user=request.user,
-            org=org,
-            name=user_name,
-            date=date_obj,
-            time_slot=selected_slot,
-            phone=phone,
-            status="Booked"
-        )
 
         return render(request, "users/booking_confirmed.html", {
             "appointment": appointment
@@ -213,7 +247,7 @@ def branch_details(request, branch_id):
     return render(request, "users/branch_details.html", {
         "org": org,
         "today": today,
-        "grouped_slots": grouped_slots,
+        "slot_grid": slot_grid,
         "selected_date": date_for_generation,
         "pre_name": pre_name,
         "pre_phone": pre_phone,
@@ -223,6 +257,63 @@ def branch_details(request, branch_id):
 
 
 
+@login_required
+def branch_availability(request, branch_id):
+    org = get_object_or_404(Organization, id=branch_id, is_active=True)
+    today = datetime.now().date()
+
+    try:
+        from_date = datetime.strptime(request.GET["from"], "%Y-%m-%d").date() if request.GET.get("from") else today
+        to_date = datetime.strptime(request.GET["to"], "%Y-%m-%d").date() if request.GET.get("to") else from_date + timedelta(days=29)
+    except (ValueError, OverflowError):
+        # OverflowError: a default range running past date.max.
+        return JsonResponse({"error": "Dates must be in YYYY-MM-DD format."}, status=400)
+
+    if to_date < from_date or (to_date - from_date).days >= AVAILABILITY_MAX_DAYS:
+        return JsonResponse({"error": f"Range must cover 1 to {AVAILABILITY_MAX_DAYS} days."}, status=400)
+
+    schedule = get_schedule(org)
+
+    booked_by_day = {}
+    booked_rows = (
+        Appointment.objects.filter(org=org, date__range=(from_date, to_date))
+        .exclude(status="Cancelled")
+        .values_list("date", "start_minute")
+        .distinct()
+    )
+    for day, start_minute in booked_rows:
+        booked_by_day.setdefault(day, set()).add(start_minute)
+
+    holidays = set(
+        Holiday.objects.filter(organization=org, date__range=(from_date, to_date))
+        .values_list("date", flat=True)
+    )
+
+    days = []
+    slot_count = len(schedule.slots)
+    for offset in range((to_date - from_date).days + 1):
+        day = from_date + timedelta(days=offset)
+        if day in holidays:
+            days.append({"date": day.isoformat(), "holiday": True, "booked": "0", "free": 0})
+            continue
+
+        bits = schedule.bitmap(booked_by_day.get(day, ()))
+        days.append({
+            "date": day.isoformat(),
+            "holiday": False,
+            "booked": format(bits, "x"),
+            "free": slot_count - bits.bit_count(),
+        })
+
+    return JsonResponse({
+        "branch": org.id,
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "slots": [label for _, _, label in schedule.slots],
+        "days": days,
+    })
+
+
 @login_required
 def book_slot(request, org_id):
     org = get_object_or_404(Organization, id=org_id, is_active=True)
@@ -238,38 +329,7 @@ def book_slot(request, org_id):
             messages.error(request, "This date is marked as holiday. No bookings allowed.")
             return redirect("branch_details", branch_id=org.id)
 
-        appointment_duration = org.appointment_duration
-        grouped_slots = []
-
-        for slot_group in slots:
-            slot_list = []
-            if hasattr(slot_group, "is_active") and not slot_group.is_active:
-                grouped_slots.append({
-                    "group_label": slot_group.slot_range,
-                    "slots": [{"slot_str": slot_group.slot_range, "available": False, "disabled": True}]
-                })
-                continue
-
-            start_str, end_str = [t.strip() for t in slot_group.slot_range.split("-")]
-            start_dt = datetime.strptime(start_str, "%I:%M %p")
-            end_dt = datetime.strptime(end_str, "%I:%M %p")
-            start_dt = datetime.combine(date_obj, start_dt.time())
-            end_dt = datetime.combine(date_obj, end_dt.time())
-
-            current = start_dt
-            while current + timedelta(minutes=appointment_duration) <= end_dt:
-                slot_str = f"{current.strftime('%I:%M %p')} – {(current + timedelta(minutes=appointment_duration)).strftime('%I:%M %p')}"
-                booked = Appointment.objects.filter(org=org, date=date_obj, time_slot=slot_str).exists()
-                slot_list.append({
-                    "slot_str": slot_str,
-                    "available": not booked
-                })
-                current += timedelta(minutes=appointment_duration)
-
-            grouped_slots.append({
-                "group_label": slot_group.slot_range,
-                "slots": slot_list
-            })
+        grouped_slots = get_schedule(org).grid(get_booked_slots(org, date_obj))
 
         request.session['booking_info'] = {
             "user_name": user_name,